@@ -0,0 +1,228 @@
+# benchmarks/bench_database.py
+"""
+Database layer benchmarks over synthetic data.
+
+    python benchmarks/bench_database.py                       # SQLite + fake Firestore, 100k users
+    python benchmarks/bench_database.py --backend sqlite --users 250000 --out before.json
+    python benchmarks/bench_database.py --fs-latency 0.003    # simulate Firestore round trips
+
+Prints (and optionally writes) JSON with per-operation latency percentiles and throughput,
+so runs from two commits can be diffed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import database  # noqa: E402
+import fake_firestore  # noqa: E402
+
+CATEGORIES = ["UltraSpeaker Express", "Ultra Gramiel Express", "GrimChallenge Express", "Daily Temple Express",
+              "Daily 4-Man Express", "Daily 7-Man Express", "Weekly Ultra Express"]
+
+
+def _summary(latencies, wall):
+    values = sorted(latencies)
+    n = len(values)
+
+    def pct(p):
+        return values[min(n - 1, int(p * n))] * 1000 if n else 0.0
+    return {
+        "ops": n,
+        "mean_ms": sum(values) / n * 1000 if n else 0.0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": values[-1] * 1000 if n else 0.0,
+        "ops_per_sec": n / wall if wall else 0.0,
+    }
+
+
+async def bench(name, results, make_call, iterations, concurrency=1):
+    """Run make_call(i) `iterations` times with up to `concurrency` in flight; record latency stats."""
+    latencies = []
+    queue = iter(range(iterations))
+
+    async def worker():
+        for i in queue:
+            started = time.perf_counter()
+            await make_call(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    results[name] = _summary(latencies, time.perf_counter() - started)
+    print(f"  {name:<36} p50 {results[name]['p50_ms']:8.3f} ms  p99 {results[name]['p99_ms']:8.3f} ms  "
+          f"{results[name]['ops_per_sec']:10.0f} ops/s", file=sys.stderr)
+
+
+# ---------- SEEDING ----------
+def synthetic_points(users, rng):
+    # Long-tailed like a real leaderboard: most users have a handful of points
+    return {100_000_000 + i: int(rng.paretovariate(1.2) * 5) for i in range(users)}
+
+
+async def seed_sqlite(db, points, panels, configs):
+    # Commit through the database's own lock: a bare commit could split the startup ledger compaction
+    async with db._atomic():
+        await db.db.executemany("INSERT INTO user_points(user_id, points) VALUES (?, ?)", points.items())
+        await db.db.executemany(
+            "INSERT INTO persistent_panels(channel_id, message_id, panel_type, data) VALUES (?, ?, ?, ?)",
+            [(900 + i % 50, 500_000 + i, "ticket" if i % 2 else "leaderboard", json.dumps({"page": i % 7}))
+             for i in range(panels)]
+        )
+        await db.db.executemany(
+            "INSERT INTO config(key, value) VALUES (?, ?)",
+            [(f"bench_{i}", json.dumps({"id": i, "text": "x" * 64})) for i in range(configs)]
+        )
+
+
+def seed_firestore(client, points, panels, configs):
+    client.store["user_points"] = {str(uid): {"user_id": uid, "points": pts} for uid, pts in points.items()}
+    client.store["persistent_panels"] = {
+        str(500_000 + i): {"channel_id": 900 + i % 50, "message_id": 500_000 + i,
+                           "panel_type": "ticket" if i % 2 else "leaderboard",
+                           "data": json.dumps({"page": i % 7}), "created_at": None}
+        for i in range(panels)
+    }
+    client.store["config"] = {f"bench_{i}": {"id": i, "text": "x" * 64} for i in range(configs)}
+
+
+# ---------- SUITE ----------
+async def run_backend(backend, args, workdir):
+    rng = random.Random(args.seed)
+    points = synthetic_points(args.users, rng)
+    user_ids = list(points)
+    results = {}
+
+    db = database.Database()
+    if backend == "sqlite":
+        database.DB_FILE = str(workdir / "bench.db")
+        await db.init()
+        started = time.perf_counter()
+        await seed_sqlite(db, points, args.panels, args.configs)
+    else:
+        database.firestore = fake_firestore
+        database.DB_FILE = str(workdir / "bench-fallback.db")  # only touched if a fallback happens
+        db.fs = fake_firestore.AsyncClient(latency=args.fs_latency)
+        db.backend = "firestore"
+        started = time.perf_counter()
+        seed_firestore(db.fs, points, args.panels, args.configs)
+    print(f"[{backend}] seeded {args.users:,} users in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    n = args.iterations
+    await bench("warm_config_cache", results, lambda i: db.warm_config_cache(), 3)
+    await bench("load_rank_index", results, lambda i: db.load_rank_index(), 3)
+
+    # Point reads and writes
+    await bench("get_points", results, lambda i: db.get_points(rng.choice(user_ids)), n)
+    await bench("set_points", results, lambda i: db.set_points(rng.choice(user_ids), rng.randint(0, 500)), n)
+    await bench("add_points", results, lambda i: db.add_points(rng.choice(user_ids), rng.randint(-5, 10)), n)
+    await bench("add_points_many_25", results,
+                lambda i: db.add_points_many({u: 5 for u in rng.sample(user_ids, 25)}), max(1, n // 10))
+
+    # Leaderboard, served from the rank index and then straight from the backend
+    total = len(points)
+    pages = max(1, total // 10)
+    for mode in ("indexed", "query"):
+        if mode == "query":
+            db.rank_index.clear()
+        await bench(f"leaderboard_page_first[{mode}]", results, lambda i: db.get_leaderboard_page(0, 10), n)
+        await bench(f"leaderboard_page_deep[{mode}]", results,
+                    lambda i: db.get_leaderboard_page(rng.randrange(pages) * 10, 10), max(1, n // 10))
+        await bench(f"count_users[{mode}]", results, lambda i: db.count_users(), max(1, n // 10))
+    await bench("get_leaderboard_full", results, lambda i: db.get_leaderboard(), 3)
+    await db.load_rank_index()
+    await bench("get_rank", results, lambda i: db.get_rank(rng.choice(user_ids)), n)
+
+    # Ticket numbers under concurrency; every number handed out must be unique
+    issued = []
+
+    async def next_number(i):
+        issued.append((CATEGORIES[i % len(CATEGORIES)], await db.increment_ticket_number(CATEGORIES[i % len(CATEGORIES)])))
+    await bench("increment_ticket_number", results, next_number, n, concurrency=args.concurrency)
+    results["increment_ticket_number"]["duplicates"] = len(issued) - len(set(issued))
+
+    # Config
+    keys = [f"bench_{i}" for i in range(args.configs)]
+    await bench("load_config[cached]", results, lambda i: db.load_config(rng.choice(keys)), n)
+    await bench("load_config[uncached]", results, lambda i: db._load_config_uncached(rng.choice(keys)), n)
+    await bench("save_config", results, lambda i: db.save_config(rng.choice(keys), {"id": i}), max(1, n // 10))
+
+    await bench("get_persistent_panels[all]", results, lambda i: db.get_persistent_panels(), 5)
+    await bench("get_persistent_panels[type]", results, lambda i: db.get_persistent_panels("ticket"), 5)
+
+    await bench("reset_points", results, lambda i: db.reset_points(), 1)
+
+    if db.backend != backend:
+        results["fell_back_to"] = db.backend
+    if backend == "firestore":
+        results["firestore_rpcs"] = db.fs.rpcs
+    results["group_commit"] = db.group_commit_stats()
+    results["reads"] = dict(db.read_stats)
+    await db.close()
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["sqlite", "firestore", "both"], default="both")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--panels", type=int, default=5_000)
+    parser.add_argument("--configs", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=2_000, help="calls per point-lookup style operation")
+    parser.add_argument("--concurrency", type=int, default=50, help="parallel increment_ticket_number callers")
+    parser.add_argument("--fs-latency", type=float, default=0.0, help="seconds added to every fake Firestore RPC")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "args": vars(args),
+            "env": {k: v for k, v in os.environ.items() if k.startswith(("DB_", "FS_", "TICKET_NUMBER"))},
+        },
+        "results": {},
+    }
+    backends = ["sqlite", "firestore"] if args.backend == "both" else [args.backend]
+    with tempfile.TemporaryDirectory() as tmp:
+        # Database copies ./bot_data.db into a custom DB_FILE; keep the bench away from real data
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            for backend in backends:
+                report["results"][backend] = await run_backend(backend, args, Path(tmp))
+        finally:
+            os.chdir(cwd)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,296 @@
+# benchmarks/fake_discord.py
+"""
+Minimal stand-ins for the Discord objects the ticket flows touch (Interaction, Guild, TextChannel,
+Member, Message), with simulated REST latency and Discord-style per-route rate limits.
+
+Rate-limit modes:
+    "wait"  - behave like py-cord's HTTP client: sleep out a 429 and retry transparently
+              (up to 5 tries), so callers only see the extra latency.
+    "raise" - surface every 429 as discord.HTTPException with Retry-After / X-RateLimit-* headers.
+"""
+import asyncio
+import itertools
+import random
+import time
+from datetime import datetime, timezone
+
+import discord
+
+# (requests, window seconds) per route kind; keyed per guild or per channel like Discord's buckets
+DEFAULT_LIMITS = {
+    "create_channel": (10, 10.0),
+    "edit_channel": (2, 600.0),
+    "delete_channel": (5, 5.0),
+    "set_permissions": (10, 10.0),
+    "send_message": (5, 5.0),
+    "edit_message": (5, 5.0),
+}
+MAX_429_RETRIES = 5
+
+# Snowflake-ish ids, unique across every FakeDiscord in the process (runs can share one database)
+_ids = itertools.count(10 ** 17)
+
+
+class _RateLimitResponse:
+    """Enough of aiohttp.ClientResponse for discord.HTTPException and the REST scheduler."""
+
+    def __init__(self, retry_after, limit, window):
+        self.status = 429
+        self.reason = "Too Many Requests"
+        self.headers = {
+            "Retry-After": f"{retry_after:.3f}",
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset-After": f"{retry_after:.3f}",
+        }
+
+
+class _Window:
+    __slots__ = ("limit", "window", "calls")
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.calls = []
+
+    def retry_after(self, now):
+        self.calls = [t for t in self.calls if now - t < self.window]
+        if len(self.calls) < self.limit:
+            self.calls.append(now)
+            return 0.0
+        return self.window - (now - self.calls[0])
+
+
+class FakeDiscord:
+    """Shared clock, latency model, rate limits and counters for one simulated guild."""
+
+    def __init__(self, latency=0.05, jitter=0.02, limits=None, rate_limit_mode="wait", seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.rate_limit_mode = rate_limit_mode
+        self.rng = random.Random(seed)
+        self.ids = _ids
+        self._windows = {}
+        self.stats = {"rest_calls": 0, "rate_limited": 0, "rate_limit_wait": 0.0}
+
+    async def rest(self, kind, bucket_id):
+        """One REST round trip: rate-limit check, then simulated network latency."""
+        self.stats["rest_calls"] += 1
+        window = self._windows.get((kind, bucket_id))
+        if window is None and kind in self.limits:
+            window = self._windows[(kind, bucket_id)] = _Window(*self.limits[kind])
+        for attempt in range(MAX_429_RETRIES + 1):
+            retry_after = window.retry_after(time.monotonic()) if window else 0.0
+            if not retry_after:
+                break
+            self.stats["rate_limited"] += 1
+            if self.rate_limit_mode == "raise" or attempt == MAX_429_RETRIES:
+                raise discord.HTTPException(_RateLimitResponse(retry_after, window.limit, window.window),
+                                            "You are being rate limited.")
+            self.stats["rate_limit_wait"] += retry_after
+            await asyncio.sleep(retry_after)
+        await self.sleep()
+
+    async def sleep(self):
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+
+
+class FakeRole:
+    def __init__(self, discord_, name="@everyone"):
+        self.id = next(discord_.ids)
+        self.name = name
+        self.mention = f"<@&{self.id}>"
+
+
+class FakePermissions:
+    def __init__(self, administrator=False):
+        self.administrator = administrator
+        self.manage_channels = administrator
+
+
+class FakeMember:
+    def __init__(self, discord_, name, administrator=False):
+        self.id = next(discord_.ids)
+        self.name = name
+        self.mention = f"<@{self.id}>"
+        self.roles = []
+        self.guild_permissions = FakePermissions(administrator)
+        self.bot = False
+
+    def __str__(self):
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, discord_, channel, author, content=None, embeds=(), view=None):
+        self.id = next(discord_.ids)
+        self.channel = channel
+        self.author = author
+        self.content = content or ""
+        self.embeds = list(embeds)
+        self.attachments = []
+        self.view = view
+        self.created_at = datetime.now(timezone.utc)
+
+    async def pin(self):
+        await self.channel.discord.rest("edit_message", self.channel.id)
+
+
+class FakePartialMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, embed=None, view=None, **kwargs):
+        await self.channel.discord.rest("edit_message", self.channel.id)
+        self.channel.edits += 1
+
+
+class FakeTextChannel:
+    def __init__(self, discord_, guild, name, overwrites=None):
+        self.discord = discord_
+        self.id = next(discord_.ids)
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.overwrites = dict(overwrites or {})
+        self.messages = []
+        self.edits = 0
+        self.created_at = datetime.now(timezone.utc)
+        self.deleted = False
+
+    async def send(self, content=None, embed=None, embeds=None, view=None, file=None, files=None, **kwargs):
+        await self.discord.rest("send_message", self.id)
+        message = FakeMessage(self.discord, self, self.guild.me, content, embeds or ([embed] if embed else []), view)
+        self.messages.append(message)
+        for f in files or ([file] if file else []):
+            f.close()
+        return message
+
+    def get_partial_message(self, message_id):
+        return FakePartialMessage(self, message_id)
+
+    async def set_permissions(self, target, overwrite=None, reason=None, **permissions):
+        await self.discord.rest("set_permissions", self.id)
+        if overwrite is None and not permissions:
+            self.overwrites.pop(target, None)
+        else:
+            self.overwrites[target] = overwrite or discord.PermissionOverwrite(**permissions)
+
+    async def edit(self, name=None, overwrites=None, reason=None, **kwargs):
+        await self.discord.rest("edit_channel", self.id)
+        if name:
+            self.name = name
+        if overwrites is not None:
+            self.overwrites = dict(overwrites)
+
+    async def delete(self, reason=None):
+        await self.discord.rest("delete_channel", self.id)
+        self.deleted = True
+        self.guild.channels.pop(self.id, None)
+
+    async def history(self, limit=None, oldest_first=False):
+        # One page per 100 messages, like the real paginated endpoint
+        messages = self.messages if oldest_first else list(reversed(self.messages))
+        for start in range(0, len(messages) if limit is None else min(limit, len(messages)), 100):
+            await self.discord.sleep()
+            for message in messages[start:start + 100]:
+                yield message
+
+
+class FakeGuild:
+    def __init__(self, discord_):
+        self.discord = discord_
+        self.id = next(discord_.ids)
+        self.default_role = FakeRole(discord_)
+        self.me = FakeMember(discord_, "bot", administrator=True)
+        self.me.bot = True
+        self.channels = {}
+        self.members = {}
+
+    def add_member(self, name, administrator=False):
+        member = FakeMember(self.discord, name, administrator)
+        self.members[member.id] = member
+        return member
+
+    def add_channel(self, name, channel_id=None):
+        channel = FakeTextChannel(self.discord, self, name)
+        if channel_id:
+            channel.id = channel_id
+        self.channels[channel.id] = channel
+        return channel
+
+    @property
+    def text_channels(self):
+        return list(self.channels.values())
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    async def create_text_channel(self, name, overwrites=None, category=None, reason=None, **kwargs):
+        await self.discord.rest("create_channel", self.id)
+        channel = FakeTextChannel(self.discord, self, name, overwrites)
+        self.channels[channel.id] = channel
+        return channel
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.responded_at = None
+
+    def is_done(self):
+        return self.responded_at is not None
+
+    async def _respond(self):
+        if self.responded_at is not None:
+            raise discord.InteractionResponded(self.interaction)
+        await self.interaction.discord.sleep()
+        self.responded_at = time.monotonic()
+
+    async def defer(self, ephemeral=False, **kwargs):
+        await self._respond()
+
+    async def send_message(self, content=None, embed=None, view=None, ephemeral=False, **kwargs):
+        self.interaction.messages.append(content)
+        await self._respond()
+
+    async def edit_message(self, content=None, embed=None, view=None, **kwargs):
+        await self._respond()
+
+    async def send_modal(self, modal):
+        await self._respond()
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, embed=None, ephemeral=False, **kwargs):
+        await self.interaction.discord.sleep()
+        self.interaction.messages.append(content)
+
+
+class FakeInteraction:
+    """An interaction created 'now'; Discord requires the first response within 3 seconds of this."""
+
+    def __init__(self, discord_, user, guild, channel):
+        self.discord = discord_
+        self.id = next(discord_.ids)
+        self.user = user
+        self.guild = guild
+        self.channel = channel
+        self.created = time.monotonic()
+        self.messages = []
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+
+    @property
+    def ack_seconds(self):
+        if self.response.responded_at is None:
+            return None
+        return self.response.responded_at - self.created
@@ -0,0 +1,209 @@
+# benchmarks/fake_firestore.py
+"""
+In-memory stand-in for the parts of firebase_admin.firestore / firestore_async that database.py uses,
+so the Firestore code paths can be benchmarked offline. Every RPC can be given an artificial latency.
+
+Use it as both the client and the `firestore` module:
+    database.firestore = fake_firestore
+    db.fs = fake_firestore.AsyncClient(latency=0.002)
+"""
+import asyncio
+import copy
+import operator
+import uuid
+
+_OPS = {"==": operator.eq, "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+class AlreadyExists(Exception):
+    """Stand-in for google.api_core.exceptions.AlreadyExists, raised when create() hits an existing doc."""
+
+
+class Increment:
+    def __init__(self, value):
+        self.value = value
+
+
+class Query:
+    # Direction constants, as on google.cloud.firestore.Query
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+
+def async_transactional(func):
+    """Run func(transaction, ...) and commit; the fake transaction holds a client-wide lock meanwhile."""
+    async def wrapper(transaction, *args, **kwargs):
+        async with transaction.client._txn_lock:
+            result = await func(transaction, *args, **kwargs)
+            await transaction.commit()
+            return result
+    return wrapper
+
+
+class _Snapshot:
+    def __init__(self, doc_id, data, reference):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+        self.reference = reference
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+class _AggregationResult:
+    def __init__(self, value):
+        self.value = value
+
+
+class _Document:
+    def __init__(self, client, collection, doc_id):
+        self.client = client
+        self.collection = collection
+        self.id = str(doc_id)
+
+    def _store(self):
+        return self.client.store.setdefault(self.collection, {})
+
+    def _write(self, data, merge=False):
+        current = self._store().get(self.id) if merge else None
+        new = dict(current or {})
+        for key, value in data.items():
+            new[key] = new.get(key, 0) + value.value if isinstance(value, Increment) else copy.deepcopy(value)
+        self._store()[self.id] = new
+
+    async def get(self, transaction=None):
+        await self.client.rpc()
+        return _Snapshot(self.id, copy.deepcopy(self._store().get(self.id)), self)
+
+    async def set(self, data, merge=False):
+        await self.client.rpc()
+        self._write(data, merge)
+
+    async def delete(self):
+        await self.client.rpc()
+        self._store().pop(self.id, None)
+
+
+class _CollectionQuery:
+    def __init__(self, client, collection, filters=(), order=None, offset=0, limit=None):
+        self.client = client
+        self.collection = collection
+        self.filters = list(filters)
+        self.order = order
+        self._offset = offset
+        self._limit = limit
+
+    def _clone(self, **changes):
+        query = _CollectionQuery(self.client, self.collection, self.filters, self.order, self._offset, self._limit)
+        for key, value in changes.items():
+            setattr(query, key, value)
+        return query
+
+    def document(self, doc_id=None):
+        return _Document(self.client, self.collection, doc_id or uuid.uuid4().hex)
+
+    def where(self, field, op, value):
+        if op not in _OPS:
+            raise NotImplementedError(f"fake Firestore does not support {op!r} filters")
+        return self._clone(filters=self.filters + [(field, _OPS[op], value)])
+
+    def order_by(self, field, direction=Query.ASCENDING):
+        return self._clone(order=(field, direction))
+
+    def offset(self, n):
+        return self._clone(_offset=n)
+
+    def limit(self, n):
+        return self._clone(_limit=n)
+
+    def _rows(self):
+        items = self.client.store.get(self.collection, {}).items()
+        for field, compare, value in self.filters:
+            items = [(k, d) for k, d in items if d.get(field) is not None and compare(d.get(field), value)]
+        items = list(items)
+        if self.order:
+            field, direction = self.order
+            items.sort(key=lambda item: (item[1].get(field), item[0]), reverse=direction == Query.DESCENDING)
+        items = items[self._offset:]
+        return items if self._limit is None else items[:self._limit]
+
+    async def stream(self):
+        await self.client.rpc()
+        for doc_id, data in self._rows():
+            yield _Snapshot(doc_id, copy.deepcopy(data), self.document(doc_id))
+
+    async def list_documents(self, page_size=None):
+        ids = list(self.client.store.get(self.collection, {}))
+        page_size = page_size or len(ids) or 1
+        for start in range(0, len(ids), page_size):
+            await self.client.rpc()
+            for doc_id in ids[start:start + page_size]:
+                yield self.document(doc_id)
+
+    def count(self):
+        query = self
+
+        class _Aggregation:
+            async def get(self):
+                await query.client.rpc()
+                return [[_AggregationResult(len(query._rows()))]]
+        return _Aggregation()
+
+
+class _WriteBatch:
+    MAX_WRITES = 500
+
+    def __init__(self, client):
+        self.client = client
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append((ref, data, merge))
+
+    def create(self, ref, data):
+        self._ops.append((ref, data, None))
+
+    def delete(self, ref):
+        self._ops.append((ref, None, False))
+
+    async def commit(self):
+        if len(self._ops) > self.MAX_WRITES:
+            raise ValueError(f"a batch can hold at most {self.MAX_WRITES} writes, got {len(self._ops)}")
+        await self.client.rpc()
+        for ref, data, merge in self._ops:
+            if merge is None and ref.id in ref._store():
+                self._ops = []
+                raise AlreadyExists(f"{ref.collection}/{ref.id} already exists")
+        for ref, data, merge in self._ops:
+            if data is None:
+                ref._store().pop(ref.id, None)
+            else:
+                ref._write(data, merge)
+        self._ops = []
+
+
+class _Transaction(_WriteBatch):
+    pass
+
+
+class AsyncClient:
+    def __init__(self, latency=0.0):
+        self.store = {}  # collection -> {doc_id: data}
+        self.latency = latency
+        self.rpcs = 0
+        self._txn_lock = asyncio.Lock()
+
+    async def rpc(self):
+        self.rpcs += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def collection(self, name):
+        return _CollectionQuery(self, name)
+
+    def batch(self):
+        return _WriteBatch(self)
+
+    def transaction(self):
+        return _Transaction(self)
@@ -0,0 +1,267 @@
+# benchmarks/load_tickets.py
+"""
+End-to-end load test of the ticket flows against a real SQLite database and fake Discord objects.
+
+Every simulated requestor opens a ticket (TicketModal), helpers race to join it (JoinButton, with
+more clickers than slots), the requestor submits proof (ProofModal) and closes it (CloseTicketButton,
+optionally double-clicked), while other users page the leaderboard (LeaderboardView).
+
+    python benchmarks/load_tickets.py                             # 10, 25 and 50 concurrent requestors
+    python benchmarks/load_tickets.py --users 100 --latency 0.12 --rate-limit-mode raise
+    python benchmarks/load_tickets.py --users 50 --double-close --out after.json
+
+Reports throughput, per-action latency and time-to-first-response percentiles, interactions that
+missed Discord's 3 second response deadline, and helper point updates that were lost or applied twice.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_discord import FakeDiscord, FakeGuild, FakeInteraction  # noqa: E402
+
+INTERACTION_DEADLINE = 3.0  # seconds Discord allows before the first response
+TRANSCRIPT_CHANNEL_ID = 1357314848253542570
+PROOF_CHANNEL_ID = 1357332638838558862
+
+
+def _summary(values):
+    values = sorted(values)
+    n = len(values)
+
+    def pct(p):
+        return values[min(n - 1, int(p * n))] * 1000 if n else 0.0
+    return {
+        "count": n,
+        "mean_ms": sum(values) / n * 1000 if n else 0.0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": values[-1] * 1000 if n else 0.0,
+    }
+
+
+class Recorder:
+    """Per-action latency, ack time, deadline misses and errors."""
+
+    def __init__(self):
+        self.actions = {}
+
+    def _entry(self, action):
+        return self.actions.setdefault(action, {"latency": [], "ack": [], "deadline_misses": 0, "errors": 0})
+
+    async def run(self, action, interaction, coro):
+        entry = self._entry(action)
+        started = time.monotonic()
+        try:
+            await coro
+        except Exception as e:
+            entry["errors"] += 1
+            print(f"[Load] {action} raised {type(e).__name__}: {e}", file=sys.stderr)
+        entry["latency"].append(time.monotonic() - started)
+        ack = interaction.ack_seconds
+        if ack is None or ack > INTERACTION_DEADLINE:
+            entry["deadline_misses"] += 1
+        if ack is not None:
+            entry["ack"].append(ack)
+
+    def report(self):
+        return {
+            action: {
+                "latency": _summary(entry["latency"]),
+                "first_response": _summary(entry["ack"]),
+                "deadline_misses": entry["deadline_misses"],
+                "errors": entry["errors"],
+            }
+            for action, entry in sorted(self.actions.items())
+        }
+
+
+# ---------- FLOWS ----------
+async def ticket_flow(tickets, fake, guild, recorder, category, args, rng):
+    """One requestor's ticket from open to close. Returns the closed ticket's info, or None."""
+    requestor = guild.add_member(f"requestor-{rng.randrange(10 ** 6)}")
+    lobby = guild.get_channel(guild.lobby_id)
+
+    modal = tickets.TicketModal(category)
+    modal.children[0].value = requestor.name
+    modal.children[1].value = "load test"
+    interaction = FakeInteraction(fake, requestor, guild, lobby)
+    await recorder.run("open_ticket", interaction, modal.callback(interaction))
+
+    ticket_info = next((t for t in tickets.active_tickets.values() if t["requestor"] == requestor.id), None)
+    if ticket_info is None:
+        return None
+    channel = guild.get_channel(ticket_info["channel_id"])
+
+    # More helpers than slots click Join at once
+    helpers = [guild.add_member(f"helper-{rng.randrange(10 ** 6)}")
+               for _ in range(len(ticket_info["helpers"]) + args.extra_helpers)]
+    joins = []
+    for helper in helpers:
+        interaction = FakeInteraction(fake, helper, guild, channel)
+        joins.append(recorder.run("join", interaction, tickets.JoinButton().callback(interaction)))
+    await asyncio.gather(*joins)
+
+    modal = tickets.ProofModal(channel.id)
+    modal.children[0].value = None
+    modal.children[1].value = "boss down"
+    interaction = FakeInteraction(fake, requestor, guild, channel)
+    await recorder.run("proof", interaction, modal.callback(interaction))
+
+    closes = []
+    for _ in range(2 if args.double_close else 1):
+        interaction = FakeInteraction(fake, requestor, guild, channel)
+        button = tickets.CloseTicketButton(requestor.id, disabled=False)
+        closes.append(recorder.run("close", interaction, button.callback(interaction)))
+    await asyncio.gather(*closes)
+    return ticket_info
+
+
+async def leaderboard_flow(leaderboard, fake, guild, recorder, clicks, rng):
+    user = guild.add_member(f"viewer-{rng.randrange(10 ** 6)}")
+    channel = guild.get_channel(guild.lobby_id)
+    view = leaderboard.LeaderboardView()
+    buttons = {child.custom_id: child for child in view.children}
+    for _ in range(clicks):
+        custom_id = rng.choice(["lb_next", "lb_next", "lb_refresh", "lb_prev"])
+        interaction = FakeInteraction(fake, user, guild, channel)
+        await recorder.run(f"leaderboard:{custom_id}", interaction, buttons[custom_id].callback(interaction))
+        await asyncio.sleep(rng.uniform(0.0, 0.2))
+
+
+# ---------- LEVEL ----------
+async def run_level(users, args, modules):
+    tickets, leaderboard, rest_scheduler, db = modules
+    rng = random.Random(args.seed + users)
+    limits = {"create_channel": (args.create_limit, 10.0)} if args.create_limit else None
+    fake = FakeDiscord(args.latency, args.jitter, limits, args.rate_limit_mode, args.seed + users)
+    guild = FakeGuild(fake)
+    guild.lobby_id = guild.add_channel("ticket-panel").id
+    guild.add_channel("transcripts", TRANSCRIPT_CHANNEL_ID)
+    guild.add_channel("proofs", PROOF_CHANNEL_ID)
+
+    # Fresh queue and ticket state per level so results are independent
+    tickets.rest_scheduler = rest_scheduler.RestScheduler(args.max_inflight)
+    tickets.active_tickets.clear()
+    recorder = Recorder()
+    categories = list(tickets.CATEGORY_CHANNEL_PREFIX)
+
+    started = time.monotonic()
+    flows = [ticket_flow(tickets, fake, guild, recorder, rng.choice(categories), args, rng) for _ in range(users)]
+    viewers = [leaderboard_flow(leaderboard, fake, guild, recorder, args.leaderboard_clicks, rng)
+               for _ in range(args.leaderboard_users)]
+    results = await asyncio.gather(*flows, *viewers)
+    wall = time.monotonic() - started
+    # Let debounced embed edits land before counting REST calls
+    await asyncio.sleep(tickets.EMBED_UPDATE_WINDOW + 0.5)
+    await db.flush()
+
+    closed = [t for t in results[:users] if t is not None]
+    expected = {}
+    for ticket in closed:
+        if ticket.get("rewarded"):
+            for helper in ticket["helpers"]:
+                if helper:
+                    expected[helper] = expected.get(helper, 0) + ticket.get("points", 5)
+    lost = duplicated = 0
+    for helper in {m.id for m in guild.members.values() if m.name.startswith("helper-")}:
+        actual = await db.get_points(helper)
+        want = expected.get(helper, 0)
+        lost += max(0, want - actual)
+        duplicated += max(0, actual - want)
+
+    level = {
+        "users": users,
+        "wall_seconds": wall,
+        "tickets_opened": len(closed),
+        "tickets_closed": sum(1 for t in closed if "cleanup" in t.get("close_stages", [])),
+        "tickets_per_sec": len(closed) / wall if wall else 0.0,
+        "left_open": len(tickets.active_tickets),
+        "points": {"expected": sum(expected.values()), "lost": lost, "duplicated": duplicated},
+        "actions": recorder.report(),
+        "discord": fake.stats,
+        "scheduler": tickets.rest_scheduler.stats(),
+    }
+    misses = sum(a["deadline_misses"] for a in level["actions"].values())
+    print(f"[Load] {users:>4} users: {level['tickets_per_sec']:.2f} tickets/s, {misses} deadline misses, "
+          f"{lost} points lost, {duplicated} duplicated", file=sys.stderr)
+    return level
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+async def main(args, workdir):
+    import database
+    database.DB_FILE = str(workdir / "load.db")
+    import tickets
+    import leaderboard
+    import rest_scheduler
+    from database import db
+
+    await db.init()
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        "levels": [],
+    }
+    try:
+        for users in args.users:
+            report["levels"].append(await run_level(users, args, (tickets, leaderboard, rest_scheduler, db)))
+    finally:
+        await db.close()
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=lambda s: [int(x) for x in s.split(",")], default=[10, 25, 50],
+                        help="comma separated concurrent requestor counts, run one after another")
+    parser.add_argument("--extra-helpers", type=int, default=1, help="join clicks beyond the ticket's slots")
+    parser.add_argument("--double-close", action="store_true", help="requestor clicks Close twice at once")
+    parser.add_argument("--leaderboard-users", type=int, default=10)
+    parser.add_argument("--leaderboard-clicks", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.08, help="mean seconds per fake Discord REST call")
+    parser.add_argument("--jitter", type=float, default=0.03)
+    parser.add_argument("--rate-limit-mode", choices=["wait", "raise"], default="wait")
+    parser.add_argument("--create-limit", type=int, default=0, help="channel creates per 10s (default: fake's own)")
+    parser.add_argument("--max-inflight", type=int, default=8, help="REST scheduler concurrency")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Database copies ./bot_data.db and the transcript archive is relative; keep both away from real data
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            report = asyncio.run(main(args, Path(tmp)))
+        finally:
+            os.chdir(cwd)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
@@ -0,0 +1,158 @@
+# channel_pool.py
+import asyncio
+import random
+import time
+from collections import deque
+
+import discord
+
+from config import DEFAULT_TICKET_POOL_SIZE, TICKET_POOL_SIZES
+from database import db
+from rest_scheduler import rest_scheduler, PRIORITY_USER, PRIORITY_CLEANUP
+
+POOL_CHANNEL_PREFIX = "pool-"
+POOL_MAINTENANCE_INTERVAL = 600  # seconds between reclaim passes
+POOL_IDLE_AFTER = 24 * 3600  # a category with no claims for this long keeps one warm channel
+
+
+class TicketChannelPool:
+    """
+    Hidden, pre-created ticket channels per category. Claiming one costs a single channel edit
+    instead of a create; refills run at cleanup priority so they never delay user-facing calls.
+    """
+
+    def __init__(self, prefixes):
+        self.prefixes = prefixes  # category name -> channel name prefix
+        self._ready = {}  # (guild_id, category) -> deque of channel ids
+        self._refilling = {}  # (guild_id, category) -> refill task
+        self._last_claim = {}
+        self._started = set()  # guild ids
+        self._started_at = time.monotonic()
+        self._maintenance = {}  # guild id -> reclaim loop
+        self.stats = {"hits": 0, "misses": 0, "created": 0, "reclaimed": 0}
+
+    def target(self, guild_id, category):
+        size = TICKET_POOL_SIZES.get(category, DEFAULT_TICKET_POOL_SIZE)
+        last = self._last_claim.get((guild_id, category), self._started_at)
+        if size and time.monotonic() - last > POOL_IDLE_AFTER:
+            return 1
+        return size
+
+    async def start(self, guild):
+        """Adopt pool channels left by a previous run, then fill every category."""
+        if guild.id in self._started:
+            return
+        self._started.add(guild.id)
+        # A disabled pool (every size 0) adopts nothing and runs no refill or reclaim tasks
+        if not any(self.target(guild.id, category) for category in self.prefixes):
+            return
+        by_prefix = {p.lower(): c for c, p in self.prefixes.items()}
+        for ch in guild.text_channels:
+            if not ch.name.startswith(POOL_CHANNEL_PREFIX):
+                continue
+            category = by_prefix.get(ch.name[len(POOL_CHANNEL_PREFIX):].rsplit("-", 1)[0])
+            if category:
+                self._ready.setdefault((guild.id, category), deque()).append(ch.id)
+        for category in self.prefixes:
+            self.refill(guild, category)
+        task = self._maintenance.get(guild.id)
+        if task is None or task.done():
+            self._maintenance[guild.id] = asyncio.create_task(self._maintain(guild))
+
+    async def claim(self, guild, category, name, overwrites, reason=None):
+        """Turn a warm channel into a ticket channel. Returns None when the pool has nothing ready."""
+        key = (guild.id, category)
+        if not self.target(guild.id, category):
+            return None
+        self._last_claim[key] = time.monotonic()
+        ready = self._ready.get(key)
+        channel = None
+        while ready and channel is None:
+            channel = guild.get_channel(ready.popleft())
+        self.refill(guild, category)
+        if channel is None:
+            self.stats["misses"] += 1
+            return None
+        try:
+            # One PATCH renames the channel and replaces its overwrites
+            await rest_scheduler.edit_channel(channel, priority=PRIORITY_USER, name=name,
+                                              overwrites=overwrites, reason=reason)
+        except Exception as e:
+            print(f"[TicketPool] Could not claim warm channel {channel.id}: {e}")
+            self._ready.setdefault(key, deque()).append(channel.id)
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return channel
+
+    async def parent_category(self, guild):
+        """The configured ticket category, or None when unset or not a category in this guild."""
+        parent_id = await db.get_ticket_category()
+        parent = guild.get_channel(parent_id) if parent_id else None
+        return parent if isinstance(parent, discord.CategoryChannel) else None
+
+    def refill(self, guild, category):
+        if not self.target(guild.id, category):
+            return
+        key = (guild.id, category)
+        task = self._refilling.get(key)
+        if task is None or task.done():
+            self._refilling[key] = asyncio.create_task(self._refill(guild, category))
+
+    async def _refill(self, guild, category):
+        ready = self._ready.setdefault((guild.id, category), deque())
+        if len(ready) >= self.target(guild.id, category):
+            return
+        parent = await self.parent_category(guild)
+        while len(ready) < self.target(guild.id, category):
+            name = f"{POOL_CHANNEL_PREFIX}{self.prefixes[category]}-{random.randint(1000, 99999)}"
+            try:
+                ch = await rest_scheduler.create_text_channel(
+                    guild,
+                    priority=PRIORITY_CLEANUP,
+                    name=name,
+                    category=parent,
+                    overwrites={guild.default_role: discord.PermissionOverwrite(view_channel=False)},
+                    reason="Warm ticket channel pool"
+                )
+            except Exception as e:
+                print(f"[TicketPool] Refill for {category} failed: {e}")
+                return
+            ready.append(ch.id)
+            self.stats["created"] += 1
+
+    async def _maintain(self, guild):
+        while True:
+            await asyncio.sleep(POOL_MAINTENANCE_INTERVAL)
+            try:
+                await self.reclaim(guild)
+            except Exception as e:
+                print(f"[TicketPool] Reclaim pass failed: {e}")
+
+    async def reclaim(self, guild):
+        """Delete warm channels beyond each category's current target (idle categories shrink to one)."""
+        for (guild_id, category), ready in list(self._ready.items()):
+            if guild_id != guild.id:
+                continue
+            while len(ready) > self.target(guild_id, category):
+                channel = guild.get_channel(ready.pop())
+                if channel is None:
+                    continue
+                try:
+                    await rest_scheduler.delete_channel(channel, priority=PRIORITY_CLEANUP,
+                                                        reason="Reclaiming idle warm ticket channel")
+                    self.stats["reclaimed"] += 1
+                except Exception as e:
+                    print(f"[TicketPool] Could not reclaim {channel.id}: {e}")
+
+    def report(self, guild_id):
+        """Per-category (ready, target) plus hit rate over all claims."""
+        claims = self.stats["hits"] + self.stats["misses"]
+        return {
+            "categories": {
+                category: (len(self._ready.get((guild_id, category), ())), self.target(guild_id, category))
+                for category in self.prefixes
+            },
+            "hit_rate": self.stats["hits"] / claims if claims else 0.0,
+            **self.stats,
+        }
@@ -1,4 +1,5 @@
 # config.py
+import os
 
 # ---------------- HELPER SLOTS ----------------
 # Number of helpers allowed per ticket category
@@ -25,3 +26,9 @@ DEFAULT_POINT_VALUES = {
     "Ultra Gramiel Express": 7,
 }
 
+# ---------------- WARM CHANNEL POOL ----------------
+# Hidden pre-created ticket channels kept ready per category (0 disables the pool)
+DEFAULT_TICKET_POOL_SIZE = int(os.getenv("TICKET_POOL_SIZE", "0"))
+TICKET_POOL_SIZES = {
+    # Per-category overrides, e.g. "Daily 4-Man Express": 4,
+}
@@ -2,29 +2,103 @@ import aiosqlite
 import json
 import os
 from pathlib import Path
+from urllib.parse import quote
 import shutil
 import asyncio
+import contextlib
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rank_index import RankIndex
+from transcript_archive import TranscriptArchive
+import metrics
 
 DEFAULT_DB_FILE = "bot_data.db"
 DB_FILE = os.getenv("DB_FILE", DEFAULT_DB_FILE)
+# Group commit (SQLite only): 0 ms commits every write immediately
+DB_GROUP_COMMIT_MS = int(os.getenv("DB_GROUP_COMMIT_MS", "0"))
+DB_GROUP_COMMIT_OPS = int(os.getenv("DB_GROUP_COMMIT_OPS", "100"))
+# Default lifetime of cached config entries in seconds; 0 keeps them until overwritten
+DB_CONFIG_TTL = float(os.getenv("DB_CONFIG_TTL", "0"))
+# Firestore caps a WriteBatch at 500 operations
+FS_BATCH_SIZE = 500
+# Max Firestore calls in flight, and threads for the little blocking Firebase work left
+FS_MAX_CONCURRENCY = int(os.getenv("FS_MAX_CONCURRENCY", "16"))
+FS_EXECUTOR_WORKERS = int(os.getenv("FS_EXECUTOR_WORKERS", "4"))
+# Hi/lo ticket numbering: reserve this many numbers per round trip (1 = no reservation)
+TICKET_NUMBER_BLOCK = int(os.getenv("TICKET_NUMBER_BLOCK", "1"))
+# SQLite tuning: WAL lets the read-only pool run alongside the single writer connection
+DB_SQLITE_WAL = os.getenv("DB_SQLITE_WAL", "1").lower() not in ("0", "false", "no")
+DB_SQLITE_SYNCHRONOUS = os.getenv("DB_SQLITE_SYNCHRONOUS", "NORMAL").upper()
+DB_SQLITE_MMAP_MB = int(os.getenv("DB_SQLITE_MMAP_MB", "256"))
+DB_SQLITE_CACHE_MB = int(os.getenv("DB_SQLITE_CACHE_MB", "16"))  # per connection
+DB_SQLITE_STATEMENT_CACHE = int(os.getenv("DB_SQLITE_STATEMENT_CACHE", "256"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))  # 0 sends reads to the writer
+# Startup maintenance: "quick" (quick_check), "full" (integrity_check) or "off"; optimize runs unless off
+DB_STARTUP_CHECK = os.getenv("DB_STARTUP_CHECK", "quick").lower()
+# Points ledger: entries older than the retention window are folded into one checkpoint per user
+DB_LEDGER_RETENTION_DAYS = float(os.getenv("DB_LEDGER_RETENTION_DAYS", "90"))
+DB_LEDGER_COMPACT_HOURS = float(os.getenv("DB_LEDGER_COMPACT_HOURS", "24"))  # 0 disables the job
 
 firebase_admin = None
 firestore = None
 
 
+@metrics.timed_methods
 class Database:
     def __init__(self):
-        self.db = None
+        self.db = None  # the only connection that writes
+        self._readers = None  # asyncio.Queue of read-only connections, when the pool is enabled
+        self._reader_conns = []
+        self.read_stats = {"pool": 0, "writer": 0}
         self.fs = None
         self.backend = "sqlite"
+        self.group_commit_ms = DB_GROUP_COMMIT_MS
+        self.group_commit_ops = max(1, DB_GROUP_COMMIT_OPS)
+        self._pending_writes = 0
+        self._flush_task = None
+        self._commit_lock = asyncio.Lock()
+        self.commit_stats = {"commits": 0, "writes": 0, "last_batch": 0, "max_batch": 0}
+        self.config_ttl = DB_CONFIG_TTL
+        self._config_cache = {}  # key -> (value, expires_at or None)
+        self._config_ttls = {}  # per-key TTL overrides
+        self._config_warm = False
+        self._config_stale = set()  # keys invalidated since warm-up; these must be read through
+        self.rank_index = RankIndex()
+        self._fs_semaphore = asyncio.Semaphore(max(1, FS_MAX_CONCURRENCY))
+        self._fs_executor = None
+        self.fs_stats = {}  # op name -> call/wait/latency totals
+        self._fs_history_indexed = True  # cleared once the ordered history query reports a missing index
+        self.ticket_number_block = max(1, TICKET_NUMBER_BLOCK)
+        self._ticket_blocks = {}  # category -> [next number, last reserved number]
+        self._ticket_block_locks = {}
+        self.leaderboard_version = 0  # bumped on every points mutation
+        self._compact_task = None
+        self.transcripts = TranscriptArchive()  # local on every backend
 
     async def init(self):
         await self._maybe_init_firebase()
         if self.fs:
             self.backend = "firestore"
             print("Using Firestore for persistence")
-            return
-        await self._ensure_sqlite_connected()
+        else:
+            await self._ensure_sqlite_connected()
+        try:
+            await self.warm_config_cache()
+        except Exception as e:
+            print(f"⚠️ Config cache warm-up failed, reading config through: {e}")
+        try:
+            await self.load_rank_index()
+        except Exception as e:
+            print(f"⚠️ Rank index load failed, serving leaderboard from queries: {e}")
+        if self.backend == "firestore":
+            try:
+                await self._fs_seed_points_ledger()
+            except Exception as e:
+                print(f"⚠️ Points ledger seeding failed: {e}")
+        if DB_LEDGER_COMPACT_HOURS > 0:
+            self._compact_task = asyncio.create_task(self._compact_ledger_loop())
 
     async def _ensure_sqlite_connected(self):
         try:
@@ -37,16 +111,99 @@ class Database:
         except Exception:
             pass
         if not self.db:
-            self.db = await aiosqlite.connect(DB_FILE)
+            self.db = await aiosqlite.connect(DB_FILE, cached_statements=DB_SQLITE_STATEMENT_CACHE)
             try:
                 print(f"Using SQLite at: {Path(DB_FILE).resolve()}")
             except Exception:
                 pass
+            wal = await self._configure_sqlite()
             await self.create_tables()
+            await self._sqlite_maintenance()
+            if wal and DB_READ_POOL_SIZE > 0:
+                await self._open_read_pool(DB_READ_POOL_SIZE)
+
+    # ---------- SQLITE CONNECTIONS ----------
+    async def _apply_pragmas(self, conn):
+        await conn.execute("PRAGMA busy_timeout = 5000")
+        await conn.execute(f"PRAGMA cache_size = {-DB_SQLITE_CACHE_MB * 1024}")
+        await conn.execute(f"PRAGMA mmap_size = {DB_SQLITE_MMAP_MB * 1024 * 1024}")
+        await conn.execute("PRAGMA temp_store = MEMORY")
+
+    async def _configure_sqlite(self):
+        """Tune the writer connection. Returns True when the database is in WAL mode."""
+        await self._apply_pragmas(self.db)
+        if DB_SQLITE_SYNCHRONOUS in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            await self.db.execute(f"PRAGMA synchronous = {DB_SQLITE_SYNCHRONOUS}")
+        if not DB_SQLITE_WAL:
+            return False
+        async with self.db.execute("PRAGMA journal_mode = WAL") as cursor:
+            mode = (await cursor.fetchone())[0]
+        if mode.lower() != "wal":
+            print(f"⚠️ SQLite refused WAL (journal_mode={mode}); reads will share the writer connection")
+            return False
+        return True
+
+    async def _sqlite_maintenance(self):
+        """Startup integrity check and planner statistics refresh. Problems are reported, not fatal."""
+        if DB_STARTUP_CHECK == "off":
+            return
+        started = time.perf_counter()
+        check = "integrity_check" if DB_STARTUP_CHECK == "full" else "quick_check"
+        try:
+            async with self.db.execute(f"PRAGMA {check}") as cursor:
+                problems = [row[0] for row in await cursor.fetchall() if row[0] != "ok"]
+            if problems:
+                print(f"⚠️ SQLite {check} found {len(problems)} problem(s): " + "; ".join(problems[:5]))
+            await self.db.execute("PRAGMA optimize")
+            print(f"SQLite {check} and optimize finished in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"⚠️ SQLite startup maintenance failed: {e}")
+
+    async def _open_read_pool(self, size):
+        uri = f"file:{quote(str(Path(DB_FILE).resolve()))}?mode=ro"
+        self._readers = asyncio.Queue()
+        for _ in range(size):
+            try:
+                conn = await aiosqlite.connect(uri, uri=True, cached_statements=DB_SQLITE_STATEMENT_CACHE)
+                await self._apply_pragmas(conn)
+                await conn.execute("PRAGMA query_only = 1")
+            except Exception as e:
+                print(f"⚠️ Could not open read-only SQLite connection: {e}")
+                break
+            self._reader_conns.append(conn)
+            self._readers.put_nowait(conn)
+        if not self._reader_conns:
+            self._readers = None
+
+    async def _close_read_pool(self):
+        conns, self._reader_conns, self._readers = self._reader_conns, [], None
+        for conn in conns:
+            await conn.close()
+
+    async def _read(self, sql, params=(), one=False):
+        """
+        Run a SELECT on a pooled read-only connection. Falls back to the writer while writes
+        are waiting for a group commit, since readers can't see the writer's open transaction.
+        """
+        if self._readers is None or self._pending_writes:
+            self.read_stats["writer"] += 1
+            async with self.db.execute(sql, params) as cursor:
+                return await (cursor.fetchone() if one else cursor.fetchall())
+        self.read_stats["pool"] += 1
+        conn = await self._readers.get()
+        try:
+            async with conn.execute(sql, params) as cursor:
+                return await (cursor.fetchone() if one else cursor.fetchall())
+        finally:
+            self._readers.put_nowait(conn)
 
     async def _fallback_to_sqlite(self, reason: str = ""):
         if self.backend != "sqlite":
             print(f"⚠️ Firestore error, falling back to SQLite. Reason: {reason}")
+            metrics.db_fallbacks.inc()
+            # The index mirrors Firestore; SQLite is served by queries from here on
+            self.rank_index.clear()
+            self.leaderboard_version += 1
             await self._ensure_sqlite_connected()
             self.backend = "sqlite"
 
@@ -58,17 +215,21 @@ class Database:
             return
         try:
             import firebase_admin as _fa
-            from firebase_admin import credentials, firestore as _fs
+            from firebase_admin import credentials, firestore as _fs, firestore_async
             firebase_admin = _fa
             firestore = _fs
-            if not firebase_admin._apps:
-                if creds_json_str:
-                    data = json.loads(creds_json_str)
-                    cred = credentials.Certificate(data)
-                else:
-                    cred = credentials.Certificate(creds_file)
-                firebase_admin.initialize_app(cred)
-            self.fs = firestore.client()
+
+            def _connect():
+                # Credential parsing and app setup are blocking, so they stay on the executor
+                if not firebase_admin._apps:
+                    if creds_json_str:
+                        data = json.loads(creds_json_str)
+                        cred = credentials.Certificate(data)
+                    else:
+                        cred = credentials.Certificate(creds_file)
+                    firebase_admin.initialize_app(cred)
+                return firestore_async.client()
+            self.fs = await self._fs_run("init", _connect)
         except Exception as e:
             print(f"⚠️ Firebase init failed, falling back to SQLite: {e}")
             self.fs = None
@@ -89,6 +250,9 @@ class Database:
         )
         """)
         await self.db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_points_rank ON user_points (points DESC, user_id)
+        """)
+        await self.db.execute("""
         CREATE TABLE IF NOT EXISTS tickets_counter (
             category TEXT PRIMARY KEY,
             last_number INTEGER
@@ -131,11 +295,246 @@ class Database:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         """)
+        await self.db.execute("""
+        CREATE TABLE IF NOT EXISTS tickets (
+            channel_id INTEGER PRIMARY KEY,
+            category TEXT,
+            requestor INTEGER,
+            helpers TEXT,
+            points INTEGER,
+            random_number INTEGER,
+            proof_submitted INTEGER DEFAULT 0,
+            proof TEXT,
+            embed_message_id INTEGER,
+            in_game TEXT,
+            concerns TEXT,
+            rewarded INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        await self._add_missing_columns("tickets", {
+            "in_game": "TEXT", "concerns": "TEXT", "rewarded": "INTEGER DEFAULT 0",
+        })
+        await self.db.execute("""
+        CREATE TABLE IF NOT EXISTS points_ledger (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            delta INTEGER NOT NULL,
+            balance INTEGER,
+            reason TEXT NOT NULL,
+            ticket_id INTEGER,
+            actor_id INTEGER,
+            created_at REAL NOT NULL
+        )
+        """)
+        await self.db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_points_ledger_user ON points_ledger (user_id, created_at)
+        """)
+        await self.db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_points_ledger_created ON points_ledger (created_at)
+        """)
+        # One ticket reward per (ticket, user), enforced by the database rather than a read-then-insert
+        await self.db.execute("DROP INDEX IF EXISTS idx_points_ledger_ticket")
+        try:
+            await self.db.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_points_ledger_ticket_reward ON points_ledger (ticket_id, user_id)
+            WHERE ticket_id IS NOT NULL AND reason = 'ticket_reward'
+            """)
+        except aiosqlite.IntegrityError as e:
+            print(f"⚠️ Duplicate ticket rewards already in points_ledger, reward index not created: {e}")
+        # user_points is a materialized balance: each entry carries the balance after it, and this
+        # trigger writes that balance in the same statement. Checkpoints and resets don't move balances.
+        await self.db.execute("""
+        CREATE TRIGGER IF NOT EXISTS points_ledger_apply AFTER INSERT ON points_ledger
+        WHEN NEW.reason NOT IN ('checkpoint', 'reset')
+        BEGIN
+            INSERT INTO user_points(user_id, points) SELECT NEW.user_id, NEW.balance WHERE NEW.reason != 'delete'
+            ON CONFLICT(user_id) DO UPDATE SET points = excluded.points;
+            DELETE FROM user_points WHERE user_id = NEW.user_id AND NEW.reason = 'delete';
+        END
+        """)
+        # Balances from before the ledger existed become opening checkpoints
+        await self.db.execute(
+            "INSERT INTO points_ledger(user_id, delta, balance, reason, created_at) "
+            "SELECT user_id, points, points, 'checkpoint', ? FROM user_points "
+            "WHERE points != 0 AND NOT EXISTS (SELECT 1 FROM points_ledger)",
+            (time.time(),)
+        )
         await self.db.commit()
 
-    async def _fs_run(self, func):
+    async def _add_missing_columns(self, table, columns):
+        """Add columns introduced after `table` was first created."""
+        async with self.db.execute(f"PRAGMA table_info({table})") as cursor:
+            existing = {row[1] for row in await cursor.fetchall()}
+        for name, decl in columns.items():
+            if name not in existing:
+                await self.db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+    # ---------- GROUP COMMIT ----------
+    async def _commit(self):
+        """Commit a write now, or leave it in the open transaction for the group flusher."""
+        if not self.group_commit_ms:
+            async with self._commit_lock:
+                await self.db.commit()
+            self._record_commit(1)
+            return
+        self._pending_writes += 1
+        if self._pending_writes >= self.group_commit_ops:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.group_commit_ms / 1000)
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"⚠️ Group commit flush failed: {e}")
+
+    async def flush(self):
+        """Commit every write still pending in the open SQLite transaction."""
+        if not self.db or not self._pending_writes:
+            return
+        async with self._commit_lock:
+            batch = self._pending_writes
+            if not batch:
+                return
+            await self.db.commit()
+            # Only count the batch as done once it's visible: until then _read stays on the writer,
+            # since pool connections can't see rows still being committed
+            self._pending_writes -= batch
+        self._record_commit(batch)
+
+    @contextlib.asynccontextmanager
+    async def _atomic(self):
+        """
+        Run several writer statements under one SAVEPOINT. Holding the commit lock keeps every other
+        commit and group flush out until it ends, so the change lands whole or not at all. A savepoint
+        (not BEGIN) nests inside a transaction already holding group-commit writes and, on failure,
+        rolls back only what came after it; those pending writes commit together with the change.
+        """
+        async with self._commit_lock:
+            await self.db.execute("SAVEPOINT atomic_change")
+            try:
+                yield
+            except BaseException:
+                await self.db.execute("ROLLBACK TO atomic_change")
+                await self.db.execute("RELEASE atomic_change")
+                raise
+            await self.db.execute("RELEASE atomic_change")
+            batch = self._pending_writes
+            await self.db.commit()
+            self._pending_writes -= batch
+        self._record_commit(batch + 1)
+
+    def _record_commit(self, batch):
+        stats = self.commit_stats
+        stats["commits"] += 1
+        stats["writes"] += batch
+        stats["last_batch"] = batch
+        stats["max_batch"] = max(stats["max_batch"], batch)
+
+    def group_commit_stats(self):
+        stats = dict(self.commit_stats)
+        stats["pending"] = self._pending_writes
+        stats["avg_batch"] = stats["writes"] / stats["commits"] if stats["commits"] else 0.0
+        return stats
+
+    async def close(self):
+        if self._compact_task and not self._compact_task.done():
+            self._compact_task.cancel()
+        await self.flush()
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self._close_read_pool()
+        if self.db:
+            await self.db.close()
+            self.db = None
+        await self.transcripts.close()
+        if self._fs_executor:
+            self._fs_executor.shutdown(wait=False)
+            self._fs_executor = None
+
+    async def ping(self):
+        """Round-trip a trivial read on the active backend; returns seconds."""
+        started = time.perf_counter()
+        if self.backend == "firestore":
+            async def _op():
+                await self.fs.collection("config").document("prefix").get()
+            await self._fs_call("ping", _op)
+        else:
+            if not self.db:
+                raise RuntimeError("database not initialized")
+            async with self.db.execute("SELECT 1") as cursor:
+                await cursor.fetchone()
+        return time.perf_counter() - started
+
+    # ---------- FIRESTORE CALLS ----------
+    async def _fs_call(self, name, op):
+        """Run an async Firestore op under the concurrency cap, recording queue wait and latency."""
+        queued = time.perf_counter()
+        async with self._fs_semaphore:
+            started = time.perf_counter()
+            try:
+                return await op()
+            finally:
+                self._record_fs_timing(name, started - queued, time.perf_counter() - started)
+
+    async def _fs_run(self, name, func):
+        """Run blocking Firebase code on the dedicated executor, not the loop's default pool."""
+        if self._fs_executor is None:
+            self._fs_executor = ThreadPoolExecutor(
+                max_workers=max(1, FS_EXECUTOR_WORKERS), thread_name_prefix="firestore"
+            )
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, func)
+
+        async def _op():
+            return await loop.run_in_executor(self._fs_executor, func)
+        return await self._fs_call(name, _op)
+
+    def _record_fs_timing(self, name, wait, latency):
+        metrics.fs_wait_seconds.observe(wait, name)
+        metrics.fs_seconds.observe(latency, name)
+        stats = self.fs_stats.get(name)
+        if stats is None:
+            stats = self.fs_stats[name] = {"calls": 0, "wait_total": 0.0, "wait_max": 0.0,
+                                           "latency_total": 0.0, "latency_max": 0.0}
+        stats["calls"] += 1
+        stats["wait_total"] += wait
+        stats["wait_max"] = max(stats["wait_max"], wait)
+        stats["latency_total"] += latency
+        stats["latency_max"] = max(stats["latency_max"], latency)
+
+    def firestore_stats(self):
+        """Per-operation call counts with average/max queue wait and latency in milliseconds."""
+        out = {}
+        for name, s in self.fs_stats.items():
+            calls = s["calls"] or 1
+            out[name] = {
+                "calls": s["calls"],
+                "wait_avg_ms": s["wait_total"] / calls * 1000,
+                "wait_max_ms": s["wait_max"] * 1000,
+                "latency_avg_ms": s["latency_total"] / calls * 1000,
+                "latency_max_ms": s["latency_max"] * 1000,
+            }
+        return out
+
+    # ---------- FIRESTORE BULK OPERATIONS ----------
+    async def _fs_bulk_write(self, ops, progress=None):
+        """Apply ("set" | "merge" | "delete", ref, data) ops in WriteBatches of FS_BATCH_SIZE."""
+        done = 0
+        for start in range(0, len(ops), FS_BATCH_SIZE):
+            batch = self.fs.batch()
+            chunk = ops[start:start + FS_BATCH_SIZE]
+            for op, ref, data in chunk:
+                if op == "delete":
+                    batch.delete(ref)
+                else:
+                    batch.set(ref, data, merge=(op == "merge"))
+            await batch.commit()
+            done += len(chunk)
+            await _report(progress, done)
+        return done
 
     # ---------- ROLES ----------
     async def set_roles(self, admin, staff, helper, restricted_ids):
@@ -220,11 +619,11 @@ class Database:
     async def add_category(self, name, questions, points, slots):
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("categories").document(str(name)).set({
+                async def _op():
+                    await self.fs.collection("categories").document(str(name)).set({
                         "name": name, "questions": questions, "points": points, "slots": slots,
                     })
-                return await self._fs_run(_op)
+                return await self._fs_call("add_category", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         questions_json = json.dumps(questions)
@@ -233,59 +632,56 @@ class Database:
             "ON CONFLICT(name) DO UPDATE SET questions=excluded.questions, points=excluded.points, slots=excluded.slots",
             (name, questions_json, points, slots)
         )
-        await self.db.commit()
+        await self._commit()
 
     async def remove_category(self, name):
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("categories").document(str(name)).delete()
+                async def _op():
+                    await self.fs.collection("categories").document(str(name)).delete()
                     return True
-                await self._fs_run(_op)
+                await self._fs_call("remove_category", _op)
                 return True
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         cursor = await self.db.execute("DELETE FROM categories WHERE name = ?", (name,))
-        await self.db.commit()
+        await self._commit()
         return cursor.rowcount > 0
 
     async def get_category(self, name):
         if self.backend == "firestore":
             try:
-                def _op():
-                    snap = self.fs.collection("categories").document(str(name)).get()
+                async def _op():
+                    snap = await self.fs.collection("categories").document(str(name)).get()
                     return snap.to_dict() if snap.exists else None
-                return await self._fs_run(_op)
+                return await self._fs_call("get_category", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        async with self.db.execute("SELECT name, questions, points, slots FROM categories WHERE name = ?", (name,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return {"name": row[0], "questions": json.loads(row[1]), "points": row[2], "slots": row[3]}
-            return None
+        row = await self._read("SELECT name, questions, points, slots FROM categories WHERE name = ?", (name,), one=True)
+        if row:
+            return {"name": row[0], "questions": json.loads(row[1]), "points": row[2], "slots": row[3]}
+        return None
 
     async def get_categories(self):
         if self.backend == "firestore":
             try:
-                def _op():
-                    docs = self.fs.collection("categories").stream()
-                    return [d.to_dict() for d in docs]
-                return await self._fs_run(_op)
+                async def _op():
+                    return [d.to_dict() async for d in self.fs.collection("categories").stream()]
+                return await self._fs_call("get_categories", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        async with self.db.execute("SELECT name, questions, points, slots FROM categories") as cursor:
-            rows = await cursor.fetchall()
-            return [{"name": r[0], "questions": json.loads(r[1]), "points": r[2], "slots": r[3]} for r in rows]
+        rows = await self._read("SELECT name, questions, points, slots FROM categories")
+        return [{"name": r[0], "questions": json.loads(r[1]), "points": r[2], "slots": r[3]} for r in rows]
 
     # ---------- CUSTOM COMMANDS ----------
     async def add_custom_command(self, name, text, image=None):
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("custom_commands").document(str(name)).set({
+                async def _op():
+                    await self.fs.collection("custom_commands").document(str(name)).set({
                         "name": name, "text": text, "image": image,
                     })
-                return await self._fs_run(_op)
+                return await self._fs_call("add_custom_command", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         await self.db.execute(
@@ -293,47 +689,98 @@ class Database:
             "ON CONFLICT(name) DO UPDATE SET text=excluded.text, image=excluded.image",
             (name, text, image)
         )
-        await self.db.commit()
+        await self._commit()
 
     async def remove_custom_command(self, name):
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("custom_commands").document(str(name)).delete()
+                async def _op():
+                    await self.fs.collection("custom_commands").document(str(name)).delete()
                     return True
-                await self._fs_run(_op)
+                await self._fs_call("remove_custom_command", _op)
                 return True
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         else:
             cursor = await self.db.execute("DELETE FROM custom_commands WHERE name = ?", (name,))
-            await self.db.commit()
+            await self._commit()
         return True
 
     async def get_custom_commands(self):
         if self.backend == "firestore":
             try:
-                def _op():
-                    docs = self.fs.collection("custom_commands").stream()
+                async def _op():
                     out = []
-                    for d in docs:
+                    async for d in self.fs.collection("custom_commands").stream():
                         data = d.to_dict() or {}
                         out.append({"name": d.id, "text": data.get("text"), "image": data.get("image")})
                     return out
-                return await self._fs_run(_op)
+                return await self._fs_call("get_custom_commands", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        async with self.db.execute("SELECT name, text, image FROM custom_commands") as cursor:
-            rows = await cursor.fetchall()
-            return [{"name": r[0], "text": r[1], "image": r[2]} for r in rows]
+        rows = await self._read("SELECT name, text, image FROM custom_commands")
+        return [{"name": r[0], "text": r[1], "image": r[2]} for r in rows]
 
     # ---------- CONFIG ----------
-    async def save_config(self, key, value_dict):
+    async def warm_config_cache(self):
+        """Load the whole config table/collection into memory in one read."""
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    return {d.id: d.to_dict() async for d in self.fs.collection("config").stream()}
+                entries = await self._fs_call("warm_config_cache", _op)
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        if self.backend == "sqlite":
+            rows = await self._read("SELECT key, value FROM config")
+            entries = {key: json.loads(value) for key, value in rows}
+        self._config_cache = {}
+        self._config_stale.clear()
+        for key, value in entries.items():
+            self._cache_config(key, value)
+        self._config_warm = True
+
+    def _cache_config(self, key, value, ttl=None):
+        if ttl is not None:
+            self._config_ttls[str(key)] = ttl
+        ttl = self._config_ttls.get(str(key), self.config_ttl)
+        expires_at = time.monotonic() + ttl if ttl and ttl > 0 else None
+        self._config_cache[str(key)] = (copy.deepcopy(value), expires_at)
+
+    def invalidate_config(self, key=None):
+        """Drop one cached config entry, or the whole cache when key is None."""
+        if key is None:
+            self._config_cache.clear()
+            self._config_stale.clear()
+            self._config_warm = False
+        else:
+            self._config_cache.pop(str(key), None)
+            self._config_stale.add(str(key))
+
+    async def save_config(self, key, value_dict, ttl=None):
+        await self._save_config_uncached(key, value_dict)
+        self._cache_config(key, value_dict, ttl)
+
+    async def load_config(self, key):
+        entry = self._config_cache.get(str(key))
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                return copy.deepcopy(value)
+        elif self._config_warm and str(key) not in self._config_stale:
+            # Every config key was loaded at warm-up and every write goes through the cache
+            return None
+        value = await self._load_config_uncached(key)
+        self._cache_config(key, value)
+        self._config_stale.discard(str(key))
+        return copy.deepcopy(value)
+
+    async def _save_config_uncached(self, key, value_dict):
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("config").document(str(key)).set(value_dict)
-                return await self._fs_run(_op)
+                async def _op():
+                    await self.fs.collection("config").document(str(key)).set(value_dict)
+                return await self._fs_call("save_config", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         value_json = json.dumps(value_dict)
@@ -341,153 +788,625 @@ class Database:
             "INSERT INTO config(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
             (key, value_json)
         )
-        await self.db.commit()
+        await self._commit()
 
-    async def load_config(self, key):
+    async def _load_config_uncached(self, key):
         if self.backend == "firestore":
             try:
-                def _op():
-                    snap = self.fs.collection("config").document(str(key)).get()
+                async def _op():
+                    snap = await self.fs.collection("config").document(str(key)).get()
                     return snap.to_dict() if snap.exists else None
-                return await self._fs_run(_op)
+                return await self._fs_call("load_config", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        async with self.db.execute("SELECT value FROM config WHERE key = ?", (key,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return json.loads(row[0])
-            return None
+        row = await self._read("SELECT value FROM config WHERE key = ?", (key,), one=True)
+        if row:
+            return json.loads(row[0])
+        return None
 
     # ---------- USER POINTS ----------
-    async def set_points(self, user_id, points):
+    # Every change is appended to points_ledger (user, applied delta, balance after, reason,
+    # ticket, actor, time) in the same transaction as the user_points balance it produces.
+    @staticmethod
+    def _ledger_entry(user_id, delta, balance, reason, ticket_id=None, actor_id=None, created_at=None):
+        return {
+            "user_id": int(user_id),
+            "delta": int(delta),
+            "balance": balance,
+            "reason": reason,
+            "ticket_id": int(ticket_id) if ticket_id else None,
+            "actor_id": int(actor_id) if actor_id else None,
+            "created_at": created_at or time.time(),
+        }
+
+    async def set_points(self, user_id, points, actor_id=None):
+        points = int(points)
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("user_points").document(str(user_id)).set({
-                        "user_id": int(user_id), "points": int(points)
-                    })
-                return await self._fs_run(_op)
+                async def _op():
+                    ref = self.fs.collection("user_points").document(str(user_id))
+                    ledger = self.fs.collection("points_ledger")
+
+                    @firestore.async_transactional
+                    async def _set(transaction):
+                        snap = await ref.get(transaction=transaction)
+                        old = int((snap.to_dict() or {}).get("points", 0)) if snap.exists else 0
+                        transaction.set(ref, {"user_id": int(user_id), "points": points})
+                        transaction.set(ledger.document(), self._ledger_entry(
+                            user_id, points - old, points, "set", actor_id=actor_id))
+                    await _set(self.fs.transaction())
+                await self._fs_call("set_points", _op)
+                self._points_changed(sets={user_id: points})
+                return
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         await self.db.execute(
-            "INSERT INTO user_points(user_id, points) VALUES (?, ?) ON CONFLICT(user_id) DO UPDATE SET points=excluded.points",
-            (user_id, points)
+            "INSERT INTO points_ledger(user_id, delta, balance, reason, actor_id, created_at) "
+            "SELECT ?1, ?2 - old, ?2, 'set', ?3, ?4 "
+            "FROM (SELECT COALESCE((SELECT points FROM user_points WHERE user_id = ?1), 0) AS old)",
+            (user_id, points, actor_id, time.time())
         )
-        await self.db.commit()
+        await self._commit()
+        self._points_changed(sets={user_id: points})
 
     async def get_points(self, user_id):
         if self.backend == "firestore":
             try:
-                def _op():
-                    snap = self.fs.collection("user_points").document(str(user_id)).get()
+                async def _op():
+                    snap = await self.fs.collection("user_points").document(str(user_id)).get()
                     if snap.exists:
                         data = snap.to_dict() or {}
                         return int(data.get("points", 0))
                     return 0
-                return await self._fs_run(_op)
+                return await self._fs_call("get_points", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        async with self.db.execute("SELECT points FROM user_points WHERE user_id = ?", (user_id,)) as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else 0
+        row = await self._read("SELECT points FROM user_points WHERE user_id = ?", (user_id,), one=True)
+        return row[0] if row else 0
+
+    async def add_points(self, user_id, delta, reason=None, ticket_id=None, actor_id=None):
+        reason = reason or ("add" if delta > 0 else "remove")
+        await self.add_points_many({user_id: delta}, reason=reason, ticket_id=ticket_id, actor_id=actor_id)
+
+    async def add_points_many(self, deltas, reason="add", ticket_id=None, actor_id=None):
+        """Atomically apply {user_id: delta} in one write. Balances never drop below zero.
+
+        On Firestore a call commits in transactions of up to FS_BATCH_SIZE // 2 users (balance plus
+        ledger entry each), so calls that size or smaller, every ticket's awards included, are
+        all-or-nothing. Larger calls can apply partially if a later chunk fails; the ledger shows
+        which users were credited.
 
-    async def reset_points(self):
+        Ticket rewards are paid at most once per (ticket_id, user): users the ledger already shows
+        as rewarded for ticket_id are skipped, so a retried close can't pay twice. The database
+        enforces it too (a unique index on SQLite, create() in one transaction on Firestore).
+        """
+        deltas = {int(uid): int(delta) for uid, delta in deltas.items() if uid and delta}
+        if not deltas:
+            return
+        now = time.time()
+        once = reason == "ticket_reward" and ticket_id is not None and all(d > 0 for d in deltas.values())
         if self.backend == "firestore":
             try:
-                def _op():
-                    docs = list(self.fs.collection("user_points").stream())
-                    for d in docs:
-                        d.reference.delete()
-                return await self._fs_run(_op)
+                async def _op():
+                    col = self.fs.collection("user_points")
+                    ledger = self.fs.collection("points_ledger")
+                    if once:
+                        # The existence check and the credit share a transaction, and create() fails
+                        # the commit if a parallel retry wrote the entry first; the retry then skips it
+                        @firestore.async_transactional
+                        async def _reward(transaction):
+                            entries = {uid: ledger.document(f"ticket-{ticket_id}-{uid}") for uid in deltas}
+                            for uid, ref in entries.items():
+                                if (await ref.get(transaction=transaction)).exists:
+                                    del deltas[uid]
+                            for uid, delta in deltas.items():
+                                transaction.create(entries[uid], self._ledger_entry(
+                                    uid, delta, None, reason, ticket_id, actor_id, now))
+                                transaction.set(col.document(str(uid)),
+                                                {"user_id": uid, "points": firestore.Increment(delta)}, merge=True)
+                        for attempt in range(2):
+                            try:
+                                await _reward(self.fs.transaction())
+                                break
+                            except Exception as e:
+                                # Lost the race to a parallel retry: run again, which now skips its entries
+                                if type(e).__name__ != "AlreadyExists" or attempt:
+                                    raise
+                        return
+                    @firestore.async_transactional
+                    async def _apply(transaction, chunk):
+                        # Increment can't clamp at zero, so removals read their balance first;
+                        # credits stay blind, so their entries carry no balance
+                        debits = {uid: col.document(str(uid)) for uid, d in chunk.items() if d < 0}
+                        current = {}
+                        for uid, ref in debits.items():
+                            snap = await ref.get(transaction=transaction)
+                            current[uid] = int((snap.to_dict() or {}).get("points", 0)) if snap.exists else 0
+                        for uid, delta in chunk.items():
+                            ref = col.document(str(uid))
+                            if uid in debits:
+                                balance = max(0, current[uid] + delta)
+                                transaction.set(ref, {"user_id": uid, "points": balance})
+                                entry = self._ledger_entry(uid, balance - current[uid], balance, reason, ticket_id, actor_id, now)
+                            else:
+                                transaction.set(ref, {"user_id": uid, "points": firestore.Increment(delta)}, merge=True)
+                                entry = self._ledger_entry(uid, delta, None, reason, ticket_id, actor_id, now)
+                            transaction.set(ledger.document(), entry)
+
+                    # Two writes per user, so a chunk of FS_BATCH_SIZE // 2 users fills one transaction
+                    items = list(deltas.items())
+                    step = FS_BATCH_SIZE // 2
+                    for start in range(0, len(items), step):
+                        await _apply(self.fs.transaction(), dict(items[start:start + step]))
+                await self._fs_call("add_points_many", _op)
+                if deltas:
+                    self._points_changed(deltas=deltas)
+                return
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        await self.db.execute("DELETE FROM user_points")
-        await self.db.commit()
+        if once:
+            # Read on the writer so uncommitted entries from a pending group commit count too
+            async with self.db.execute(
+                "SELECT user_id FROM points_ledger WHERE ticket_id = ? AND reason = 'ticket_reward'", (ticket_id,)
+            ) as cur:
+                for (uid,) in await cur.fetchall():
+                    deltas.pop(uid, None)
+            if not deltas:
+                return
+        # The ledger records the applied (clamped) delta; the trigger updates user_points. OR IGNORE
+        # lets the unique ticket-reward index drop a second payout instead of failing the batch
+        await self.db.executemany(
+            "INSERT OR IGNORE INTO points_ledger(user_id, delta, balance, reason, ticket_id, actor_id, created_at) "
+            "SELECT ?1, MAX(0, old + ?2) - old, MAX(0, old + ?2), ?3, ?4, ?5, ?6 "
+            "FROM (SELECT COALESCE((SELECT points FROM user_points WHERE user_id = ?1), 0) AS old)",
+            [(uid, delta, reason, ticket_id, actor_id, now) for uid, delta in deltas.items()]
+        )
+        await self._commit()
+        self._points_changed(deltas=deltas)
+
+    def _points_changed(self, sets=None, deltas=None, removed=None, reset=False):
+        """Mirror a completed points write into the rank index and bump the leaderboard version."""
+        self.leaderboard_version += 1
+        if reset:
+            self.rank_index.load([])
+            return
+        if not self.rank_index.loaded:
+            return
+        for uid, pts in (sets or {}).items():
+            self.rank_index.set(uid, pts)
+        for uid, delta in (deltas or {}).items():
+            self.rank_index.add(uid, delta)
+        for uid in removed or ():
+            self.rank_index.remove(uid)
+
+    async def reset_points(self, progress=None, actor_id=None):
+        """Delete every points row, recording a reset entry per user. `progress(deleted_so_far)` may be sync or async."""
+        now = time.time()
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    ledger = self.fs.collection("points_ledger")
+                    done = 0
+                    pending = []
+                    async for d in self.fs.collection("user_points").stream():
+                        points = int((d.to_dict() or {}).get("points", 0))
+                        pending.append(("delete", d.reference, None))
+                        pending.append(("set", ledger.document(), self._ledger_entry(
+                            d.id, -points, 0, "reset", actor_id=actor_id, created_at=now)))
+                        if len(pending) >= FS_BATCH_SIZE:
+                            done += await self._fs_bulk_write(pending) // 2
+                            pending = []
+                            await _report(progress, done)
+                    if pending:
+                        done += await self._fs_bulk_write(pending) // 2
+                        await _report(progress, done)
+                    return done
+                await self._fs_call("reset_points", _op)
+                self._points_changed(reset=True)
+                return
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        # Balances and their reset entries commit together
+        async with self._atomic():
+            async with self.db.execute("DELETE FROM user_points RETURNING user_id, points") as cursor:
+                removed = await cursor.fetchall()
+            await self.db.executemany(
+                "INSERT INTO points_ledger(user_id, delta, balance, reason, actor_id, created_at) "
+                "VALUES (?, ?, 0, 'reset', ?, ?)",
+                [(uid, -points, actor_id, now) for uid, points in removed if points]
+            )
+        self._points_changed(reset=True)
+        await _report(progress, len(removed))
 
     async def get_leaderboard(self):
         if self.backend == "firestore":
             try:
-                def _op():
-                    docs = self.fs.collection("user_points").stream()
+                async def _op():
                     rows = []
-                    for d in docs:
+                    async for d in self.fs.collection("user_points").stream():
                         data = d.to_dict() or {}
                         rows.append((int(data.get("user_id", d.id)), int(data.get("points", 0))))
                     rows.sort(key=lambda x: x[1], reverse=True)
                     return rows
-                return await self._fs_run(_op)
+                return await self._fs_call("get_leaderboard", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        async with self.db.execute("SELECT user_id, points FROM user_points ORDER BY points DESC") as cursor:
-            rows = await cursor.fetchall()
-            return [(uid, pts) for uid, pts in rows]
+        rows = await self._read("SELECT user_id, points FROM user_points ORDER BY points DESC, user_id")
+        return [(uid, pts) for uid, pts in rows]
 
-    async def delete_user_points(self, user_id):
+    async def get_leaderboard_page(self, offset, limit):
+        """Return up to `limit` (user_id, points) rows starting at rank `offset` (0-based)."""
+        offset = max(0, int(offset))
+        limit = max(0, int(limit))
+        if self.rank_index.loaded:
+            return self.rank_index.page(offset, limit)
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("user_points").document(str(user_id)).delete()
-                return await self._fs_run(_op)
+                async def _op():
+                    query = (
+                        self.fs.collection("user_points")
+                        .order_by("points", direction=firestore.Query.DESCENDING)
+                        .offset(offset)
+                        .limit(limit)
+                    )
+                    rows = []
+                    async for d in query.stream():
+                        data = d.to_dict() or {}
+                        rows.append((int(data.get("user_id", d.id)), int(data.get("points", 0))))
+                    return rows
+                return await self._fs_call("get_leaderboard_page", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        await self.db.execute("DELETE FROM user_points WHERE user_id = ?", (user_id,))
-        await self.db.commit()
+        rows = await self._read(
+            "SELECT user_id, points FROM user_points ORDER BY points DESC, user_id LIMIT ? OFFSET ?",
+            (limit, offset)
+        )
+        return [(uid, pts) for uid, pts in rows]
+
+    async def count_users(self):
+        if self.rank_index.loaded:
+            return len(self.rank_index)
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    result = await self.fs.collection("user_points").count().get()
+                    return int(result[0][0].value)
+                return await self._fs_call("count_users", _op)
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        row = await self._read("SELECT COUNT(*) FROM user_points", one=True)
+        return row[0] if row else 0
+
+    async def load_rank_index(self):
+        self.rank_index.load(await self.get_leaderboard())
+        self.leaderboard_version += 1
+
+    async def get_rank(self, user_id):
+        """Return (rank, total) from the in-memory index; rank is None if unranked or the index is unavailable."""
+        if not self.rank_index.loaded:
+            return None, await self.count_users()
+        return self.rank_index.rank(user_id), len(self.rank_index)
+
+    async def delete_user_points(self, user_id, actor_id=None):
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    ref = self.fs.collection("user_points").document(str(user_id))
+                    ledger = self.fs.collection("points_ledger")
+
+                    @firestore.async_transactional
+                    async def _delete(transaction):
+                        snap = await ref.get(transaction=transaction)
+                        old = int((snap.to_dict() or {}).get("points", 0)) if snap.exists else 0
+                        transaction.delete(ref)
+                        transaction.set(ledger.document(), self._ledger_entry(
+                            user_id, -old, 0, "delete", actor_id=actor_id))
+                    await _delete(self.fs.transaction())
+                await self._fs_call("delete_user_points", _op)
+                self._points_changed(removed=[user_id])
+                return
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        await self.db.execute(
+            "INSERT INTO points_ledger(user_id, delta, balance, reason, actor_id, created_at) "
+            "SELECT ?1, -old, 0, 'delete', ?2, ?3 "
+            "FROM (SELECT COALESCE((SELECT points FROM user_points WHERE user_id = ?1), 0) AS old)",
+            (user_id, actor_id, time.time())
+        )
+        await self._commit()
+        self._points_changed(removed=[user_id])
+
+    # ---------- POINTS LEDGER ----------
+    async def get_points_history(self, user_id, limit=20):
+        """A user's most recent ledger entries, newest first."""
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    entries = self.fs.collection("points_ledger").where("user_id", "==", int(user_id))
+                    if self._fs_history_indexed:
+                        try:
+                            query = entries.order_by("created_at", direction=firestore.Query.DESCENDING).limit(limit)
+                            return [d.to_dict() async for d in query.stream()]
+                        except Exception as e:
+                            # Equality plus order_by needs a composite index on points_ledger
+                            # (user_id ASC, created_at DESC). Without it Firestore raises FailedPrecondition;
+                            # that's a deploy gap, not an outage, so sort locally instead of failing over
+                            if type(e).__name__ != "FailedPrecondition":
+                                raise
+                            self._fs_history_indexed = False
+                            print(f"⚠️ points_ledger needs a composite index (user_id asc, created_at desc); "
+                                  f"sorting history locally until restart: {e}")
+                    # Retention compaction keeps a user's entries bounded, so the full set is small
+                    docs = [d.to_dict() async for d in entries.stream()]
+                    docs.sort(key=lambda d: d.get("created_at", 0), reverse=True)
+                    return docs[:limit]
+                return await self._fs_call("get_points_history", _op)
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        rows = await self._read(
+            "SELECT user_id, delta, balance, reason, ticket_id, actor_id, created_at FROM points_ledger "
+            "WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (user_id, limit)
+        )
+        return [
+            {"user_id": r[0], "delta": r[1], "balance": r[2], "reason": r[3],
+             "ticket_id": r[4], "actor_id": r[5], "created_at": r[6]}
+            for r in rows
+        ]
+
+    async def compact_points_ledger(self, retention_days=None):
+        """
+        Fold each user's ledger entries older than the retention window into one checkpoint
+        whose delta is their sum, so per-user deltas still add up to the balance. Returns entries removed.
+        """
+        days = DB_LEDGER_RETENTION_DAYS if retention_days is None else retention_days
+        cutoff = time.time() - days * 86400
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    return await self._fs_compact_points_ledger(cutoff)
+                return await self._fs_call("compact_points_ledger", _op)
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        # The checkpoint and the delete must commit together, or the ledger sum drifts from the balance
+        async with self._atomic():
+            # Entries appended while compacting get ids above max_id and are left alone
+            async with self.db.execute("SELECT COALESCE(MAX(id), 0) FROM points_ledger") as cursor:
+                max_id = (await cursor.fetchone())[0]
+            await self.db.execute(
+                "INSERT INTO points_ledger(user_id, delta, balance, reason, created_at) "
+                "SELECT user_id, SUM(delta), SUM(delta), 'checkpoint', MAX(created_at) FROM points_ledger "
+                "WHERE id <= ?1 AND created_at < ?2 GROUP BY user_id HAVING COUNT(*) > 1 AND SUM(delta) != 0",
+                (max_id, cutoff)
+            )
+            cursor = await self.db.execute(
+                "DELETE FROM points_ledger WHERE id <= ?1 AND created_at < ?2 AND user_id IN ("
+                "SELECT user_id FROM points_ledger WHERE id <= ?1 AND created_at < ?2 "
+                "GROUP BY user_id HAVING COUNT(*) > 1 OR SUM(delta) = 0)",
+                (max_id, cutoff)
+            )
+        return cursor.rowcount
+
+    async def _fs_compact_points_ledger(self, cutoff):
+        ledger = self.fs.collection("points_ledger")
+        old = {}
+        async for d in ledger.where("created_at", "<", cutoff).stream():
+            data = d.to_dict() or {}
+            old.setdefault(int(data.get("user_id", 0)), []).append((d.reference, data))
+        ops = []
+        for user_id, entries in old.items():
+            total = sum(int(data.get("delta", 0)) for _, data in entries)
+            if len(entries) < 2 and total:
+                continue
+            if total:
+                last = max(data.get("created_at", 0) for _, data in entries)
+                ops.append(("set", ledger.document(), self._ledger_entry(
+                    user_id, total, total, "checkpoint", created_at=last)))
+            ops.extend(("delete", ref, None) for ref, _ in entries)
+        await self._fs_bulk_write(ops)
+        return sum(1 for op, _, _ in ops if op == "delete")
+
+    async def _fs_seed_points_ledger(self):
+        """Give existing Firestore balances opening checkpoints the first time the ledger is used."""
+        async def _op():
+            ledger = self.fs.collection("points_ledger")
+            async for _ in ledger.limit(1).stream():
+                return
+            now = time.time()
+            ops = []
+            async for d in self.fs.collection("user_points").stream():
+                points = int((d.to_dict() or {}).get("points", 0))
+                if points:
+                    ops.append(("set", ledger.document(), self._ledger_entry(d.id, points, points, "checkpoint", created_at=now)))
+            await self._fs_bulk_write(ops)
+        await self._fs_call("seed_points_ledger", _op)
+
+    async def _compact_ledger_loop(self):
+        while True:
+            try:
+                removed = await self.compact_points_ledger()
+                if removed:
+                    print(f"Compacted {removed} points ledger entries into checkpoints")
+            except Exception as e:
+                print(f"⚠️ Points ledger compaction failed: {e}")
+            await asyncio.sleep(DB_LEDGER_COMPACT_HOURS * 3600)
 
     # ---------- TICKET COUNTER ----------
     async def get_ticket_number(self, category):
         if self.backend == "firestore":
             try:
-                def _op():
-                    snap = self.fs.collection("tickets_counter").document(str(category)).get()
+                async def _op():
+                    snap = await self.fs.collection("tickets_counter").document(str(category)).get()
                     if snap.exists:
                         data = snap.to_dict() or {}
                         return int(data.get("last_number", 0))
                     return 0
-                return await self._fs_run(_op)
+                return await self._fs_call("get_ticket_number", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        async with self.db.execute("SELECT last_number FROM tickets_counter WHERE category = ?", (category,)) as cursor:
-            row = await cursor.fetchone()
-            return row[0] if row else 0
+        row = await self._read("SELECT last_number FROM tickets_counter WHERE category = ?", (category,), one=True)
+        return row[0] if row else 0
 
     async def increment_ticket_number(self, category):
+        if self.ticket_number_block <= 1:
+            return await self._reserve_ticket_numbers(category, 1)
+        # Hi/lo: hand out numbers from a block reserved in one round trip.
+        # Numbers left in a block when the process stops are skipped, never reused.
+        lock = self._ticket_block_locks.setdefault(category, asyncio.Lock())
+        async with lock:
+            block = self._ticket_blocks.get(category)
+            if block is None or block[0] > block[1]:
+                last = await self._reserve_ticket_numbers(category, self.ticket_number_block)
+                block = self._ticket_blocks[category] = [last - self.ticket_number_block + 1, last]
+            number = block[0]
+            block[0] += 1
+            return number
+
+    async def _reserve_ticket_numbers(self, category, count):
+        """Atomically advance a category counter by `count` and return the new last number."""
         if self.backend == "firestore":
             try:
-                def _op():
+                async def _op():
                     doc = self.fs.collection("tickets_counter").document(str(category))
-                    snap = doc.get()
-                    last = 0
-                    if snap.exists:
-                        data = snap.to_dict() or {}
-                        last = int(data.get("last_number", 0))
-                    last += 1
-                    doc.set({"category": category, "last_number": last})
-                    return last
-                return await self._fs_run(_op)
+
+                    @firestore.async_transactional
+                    async def _advance(transaction):
+                        snap = await doc.get(transaction=transaction)
+                        last = int((snap.to_dict() or {}).get("last_number", 0)) if snap.exists else 0
+                        last += count
+                        transaction.set(doc, {"category": category, "last_number": last})
+                        return last
+                    return await _advance(self.fs.transaction())
+                return await self._fs_call("increment_ticket_number", _op)
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        async with self.db.execute(
+            "INSERT INTO tickets_counter(category, last_number) VALUES (?1, ?2) "
+            "ON CONFLICT(category) DO UPDATE SET last_number = last_number + ?2 "
+            "RETURNING last_number",
+            (category, count)
+        ) as cursor:
+            row = await cursor.fetchone()
+        await self._commit()
+        return row[0]
+
+    # ---------- TICKETS ----------
+    @staticmethod
+    def _ticket_record(ticket):
+        return {
+            "channel_id": int(ticket["channel_id"]),
+            "category": ticket.get("category"),
+            "requestor": int(ticket["requestor"]),
+            "helpers": [int(h) if h else None for h in ticket.get("helpers", [])],
+            "points": int(ticket.get("points", 0)),
+            "random_number": ticket.get("random_number"),
+            "proof_submitted": bool(ticket.get("proof_submitted", False)),
+            "proof": ticket.get("proof"),
+            "embed_message_id": ticket.get("embed_message_id"),
+            "in_game": ticket.get("in_game"),
+            "concerns": ticket.get("concerns"),
+            "rewarded": bool(ticket.get("rewarded", False)),
+        }
+
+    async def save_ticket(self, ticket):
+        """Write the full state of an open ticket (keyed by channel id)."""
+        record = self._ticket_record(ticket)
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    await self.fs.collection("tickets").document(str(record["channel_id"])).set(record)
+                return await self._fs_call("save_ticket", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
-        last = await self.get_ticket_number(category) + 1
         await self.db.execute(
-            "INSERT INTO tickets_counter(category, last_number) VALUES (?, ?) "
-            "ON CONFLICT(category) DO UPDATE SET last_number = excluded.last_number",
-            (category, last)
+            "INSERT INTO tickets(channel_id, category, requestor, helpers, points, random_number, "
+            "proof_submitted, proof, embed_message_id, in_game, concerns, rewarded) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(channel_id) DO UPDATE SET category=excluded.category, requestor=excluded.requestor, "
+            "helpers=excluded.helpers, points=excluded.points, random_number=excluded.random_number, "
+            "proof_submitted=excluded.proof_submitted, proof=excluded.proof, embed_message_id=excluded.embed_message_id, "
+            "in_game=excluded.in_game, concerns=excluded.concerns, rewarded=excluded.rewarded",
+            (record["channel_id"], record["category"], record["requestor"], json.dumps(record["helpers"]),
+             record["points"], record["random_number"], int(record["proof_submitted"]), record["proof"],
+             record["embed_message_id"], record["in_game"], record["concerns"], int(record["rewarded"]))
         )
-        await self.db.commit()
-        return last
+        await self._commit()
+
+    async def get_open_tickets(self):
+        """Every open ticket in one read, as ticket_info dicts."""
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    return [d.to_dict() async for d in self.fs.collection("tickets").stream()]
+                return await self._fs_call("get_open_tickets", _op)
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        rows = await self._read(
+            "SELECT channel_id, category, requestor, helpers, points, random_number, "
+            "proof_submitted, proof, embed_message_id, in_game, concerns, rewarded FROM tickets"
+        )
+        return [
+            {
+                "channel_id": row[0],
+                "category": row[1],
+                "requestor": row[2],
+                "helpers": json.loads(row[3] or "[]"),
+                "points": row[4],
+                "random_number": row[5],
+                "proof_submitted": bool(row[6]),
+                "proof": row[7],
+                "embed_message_id": row[8],
+                "in_game": row[9],
+                "concerns": row[10],
+                "rewarded": bool(row[11]),
+            }
+            for row in rows
+        ]
+
+    async def delete_ticket(self, channel_id):
+        if self.backend == "firestore":
+            try:
+                async def _op():
+                    await self.fs.collection("tickets").document(str(channel_id)).delete()
+                return await self._fs_call("delete_ticket", _op)
+            except Exception as e:
+                await self._fallback_to_sqlite(str(e))
+        await self.db.execute("DELETE FROM tickets WHERE channel_id = ?", (channel_id,))
+        await self._commit()
+
+    # ---------- TRANSCRIPT ARCHIVE ----------
+    async def archive_transcript(self, ticket_info, fp, closer_id=None, message_count=0, closed_at=None):
+        """Append a closed ticket's transcript (read from fp) to the local archive."""
+        await self.transcripts.open()
+        return await self.transcripts.append(
+            ticket_info, fp, closed_at or time.time(), closer_id=closer_id, message_count=message_count
+        )
+
+    async def search_transcripts(self, helper=None, requestor=None, category=None, since=None, until=None,
+                                 has_proof=None, limit=25):
+        await self.transcripts.open()
+        return await self.transcripts.search(
+            helper=helper, requestor=requestor, category=category, since=since, until=until,
+            has_proof=has_proof, limit=limit
+        )
+
+    async def get_archived_transcript(self, ticket_id):
+        await self.transcripts.open()
+        return await self.transcripts.read(ticket_id)
 
     # ---------- PERSISTENT PANELS ----------
     async def save_persistent_panel(self, channel_id, message_id, panel_type, data):
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("persistent_panels").document(str(message_id)).set({
+                async def _op():
+                    await self.fs.collection("persistent_panels").document(str(message_id)).set({
                         "channel_id": int(channel_id),
                         "message_id": int(message_id),
                         "panel_type": panel_type,
                         "data": json.dumps(data),
                         "created_at": None
                     })
-                return await self._fs_run(_op)
+                return await self._fs_call("save_persistent_panel", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         data_json = json.dumps(data)
@@ -496,18 +1415,17 @@ class Database:
             "ON CONFLICT(message_id) DO UPDATE SET data=excluded.data",
             (channel_id, message_id, panel_type, data_json)
         )
-        await self.db.commit()
+        await self._commit()
 
     async def get_persistent_panels(self, panel_type=None):
         if self.backend == "firestore":
             try:
-                def _op():
+                async def _op():
                     query = self.fs.collection("persistent_panels")
                     if panel_type:
                         query = query.where("panel_type", "==", panel_type)
-                    docs = query.stream()
                     panels = []
-                    for d in docs:
+                    async for d in query.stream():
                         data = d.to_dict() or {}
                         panels.append({
                             "channel_id": int(data.get("channel_id", 0)),
@@ -516,20 +1434,16 @@ class Database:
                             "data": json.loads(data.get("data", "{}"))
                         })
                     return panels
-                return await self._fs_run(_op)
+                return await self._fs_call("get_persistent_panels", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         if panel_type:
-            async with self.db.execute(
+            rows = await self._read(
                 "SELECT channel_id, message_id, panel_type, data FROM persistent_panels WHERE panel_type = ?",
                 (panel_type,)
-            ) as cursor:
-                rows = await cursor.fetchall()
+            )
         else:
-            async with self.db.execute(
-                "SELECT channel_id, message_id, panel_type, data FROM persistent_panels"
-            ) as cursor:
-                rows = await cursor.fetchall()
+            rows = await self._read("SELECT channel_id, message_id, panel_type, data FROM persistent_panels")
         return [
             {
                 "channel_id": row[0],
@@ -543,13 +1457,21 @@ class Database:
     async def delete_persistent_panel(self, message_id):
         if self.backend == "firestore":
             try:
-                def _op():
-                    self.fs.collection("persistent_panels").document(str(message_id)).delete()
-                return await self._fs_run(_op)
+                async def _op():
+                    await self.fs.collection("persistent_panels").document(str(message_id)).delete()
+                return await self._fs_call("delete_persistent_panel", _op)
             except Exception as e:
                 await self._fallback_to_sqlite(str(e))
         await self.db.execute("DELETE FROM persistent_panels WHERE message_id = ?", (message_id,))
-        await self.db.commit()
+        await self._commit()
+
+
+async def _report(progress, done):
+    """Call a sync or async progress callback, if one was given."""
+    if progress:
+        result = progress(done)
+        if asyncio.iscoroutine(result):
+            await result
 
 
 db = Database()
\ No newline at end of file
@@ -71,8 +71,8 @@ class CustomHardcodedModule(commands.Cog):
         embed.add_field(
             name="📊 Points & Leaderboard",
             value=(
-                "`/leaderboard [page]` — View top helpers\n"
-                "`/points [user]` — Check points\n"
+                "`/leaderboard [user]` — View top helpers (or jump to a user)\n"
+                "`/points [user]` — Check points and rank\n"
                 "`/points_add @user amount` — Add points (admin)\n"
                 "`/points_remove @user amount` — Remove points (admin)\n"
                 "`/points_set @user amount` — Set exact points (admin)\n"
@@ -4,17 +4,43 @@ from database import db
 
 ACCENT = 0x5865F2
 
+# Rendered pages keyed by (page, per_page, db.leaderboard_version)
+EMBED_CACHE_MAX = 64
+_embed_cache = {}
+embed_cache_stats = {"hits": 0, "misses": 0}
+
+
 async def create_leaderboard_embed(page: int = 1, per_page: int = 10) -> discord.Embed:
-    rows = await db.get_leaderboard()
-    sorted_points = sorted(rows, key=lambda x: x[1], reverse=True)
-    total_pages = max(1, (len(sorted_points) + per_page - 1) // per_page)
+    key = (page, per_page, db.leaderboard_version)
+    cached = _embed_cache.get(key)
+    if cached is not None:
+        embed_cache_stats["hits"] += 1
+        return cached.copy()
+    embed_cache_stats["misses"] += 1
+    embed = await _render_leaderboard_embed(page, per_page)
+    _store_embed(key, embed)
+    return embed.copy()
+
+
+def _store_embed(key, embed):
+    # Pages rendered for an older version can never be served again
+    for stale in [k for k in _embed_cache if k[2] != key[2]]:
+        del _embed_cache[stale]
+    while len(_embed_cache) >= EMBED_CACHE_MAX:
+        del _embed_cache[next(iter(_embed_cache))]
+    _embed_cache[key] = embed
+
+
+async def _render_leaderboard_embed(page: int, per_page: int) -> discord.Embed:
+    total_users = await db.count_users()
+    total_pages = max(1, (total_users + per_page - 1) // per_page)
     page = max(1, min(page, total_pages))
     start = (page - 1) * per_page
-    end = start + per_page
+    rows = await db.get_leaderboard_page(start, per_page)
 
     lines = []
     top_emojis = ["🥇", "🥈", "🥉"]
-    for idx, (user_id, pts) in enumerate(sorted_points[start:end], start=start + 1):
+    for idx, (user_id, pts) in enumerate(rows, start=start + 1):
         prefix = f"**#{idx}** "
         if idx <= 3:
             prefix += f"{top_emojis[idx - 1]} "
@@ -37,8 +63,8 @@ class LeaderboardView(discord.ui.View):
         self.total_pages = 1
 
     async def update_total_pages(self):
-        rows = await db.get_leaderboard()
-        self.total_pages = max(1, (len(rows) + self.per_page - 1) // self.per_page)
+        total_users = await db.count_users()
+        self.total_pages = max(1, (total_users + self.per_page - 1) // self.per_page)
 
     @discord.ui.button(style=discord.ButtonStyle.gray, emoji="◀️", custom_id="lb_prev")
     async def prev_page(self, button: discord.ui.Button, interaction: discord.Interaction):
@@ -71,9 +97,18 @@ class Leaderboard(commands.Cog):
         self.bot = bot
 
     @commands.slash_command(name="leaderboard", description="Show the helper leaderboard")
-    async def leaderboard(self, ctx: discord.ApplicationContext):
-        embed = await create_leaderboard_embed(page=1, per_page=10)
-        view = LeaderboardView(current_page=1, per_page=10)
+    async def leaderboard(
+        self,
+        ctx: discord.ApplicationContext,
+        user: discord.Option(discord.User, "Jump to the page containing this user", required=False),
+    ):
+        page = 1
+        if user:
+            rank, _ = await db.get_rank(user.id)
+            if rank:
+                page = (rank - 1) // 10 + 1
+        embed = await create_leaderboard_embed(page=page, per_page=10)
+        view = LeaderboardView(current_page=page, per_page=10)
         await ctx.respond(embed=embed, view=view)
 
 async def setup(bot):
@@ -4,18 +4,41 @@ from discord.ext import commands
 from leaderboard import Leaderboard, LeaderboardView
 from point_commands import PointsModule
 from verification import VerificationModule, VerificationPanelView
+from profiler import ProfilingModule
+from database import db
+import webserver
+import metrics
 import os
 
 
 TOKEN = os.environ.get("DISCORD_BOT_TOKEN")
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+
+class Bot(commands.Bot):
+    async def start(self, *args, **kwargs):
+        await webserver.start(self)
+        await db.init()
+        await super().start(*args, **kwargs)
+
+    async def close(self):
+        # Commit anything the group-commit flusher still holds before the loop stops
+        try:
+            await db.close()
+        except Exception as e:
+            print(f"⚠️ Database close failed: {e}")
+        await webserver.stop()
+        await super().close()
+
+
+bot = Bot(command_prefix="!", intents=intents)
 
 
 def register_cogs(bot):
     bot.add_cog(Leaderboard(bot))
     bot.add_cog(PointsModule(bot))
     bot.add_cog(VerificationModule(bot))
+    bot.add_cog(ProfilingModule(bot))
 
 
 @bot.event
@@ -27,6 +50,7 @@ async def on_ready():
 
 
 def main():
+    metrics.install(bot)  # before cogs, so runtime profiling patches stack on top and unwind cleanly
     register_cogs(bot)
     bot.run(TOKEN)
 
@@ -0,0 +1,225 @@
+# metrics.py
+import functools
+import inspect
+import os
+import time
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {} if labelnames else {(): 0.0}
+
+    def inc(self, *labels, amount=1.0):
+        if METRICS_ENABLED:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge:
+    """A value read at scrape time from a callable."""
+
+    def __init__(self, name, help_text, func):
+        self.name = name
+        self.help = help_text
+        self.func = func
+
+    def render(self):
+        try:
+            value = float(self.func())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, *labels):
+        if not METRICS_ENABLED:
+            return
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, [le])} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, [le])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _get(self, cls, name, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._get(Counter, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labelnames, buckets)
+
+    def gauge(self, name, help_text, func):
+        return self._get(Gauge, name, help_text, func)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+interaction_seconds = registry.histogram(
+    "bot_interaction_seconds", "Slash command, button and modal handling time", ("kind", "name", "outcome"))
+db_seconds = registry.histogram(
+    "bot_db_operation_seconds", "Database method latency", ("method", "backend", "outcome"))
+db_fallbacks = registry.counter(
+    "bot_db_fallbacks_total", "Firestore errors that switched the bot to SQLite")
+fs_wait_seconds = registry.histogram(
+    "bot_firestore_queue_wait_seconds", "Time Firestore calls waited for a concurrency slot", ("operation",))
+fs_seconds = registry.histogram(
+    "bot_firestore_call_seconds", "Firestore call latency once running", ("operation",))
+rest_seconds = registry.histogram(
+    "bot_discord_rest_seconds", "Discord REST call latency by route", ("method", "route", "status"))
+
+
+# ---------- DECORATORS ----------
+def timed_methods(cls):
+    """
+    Class decorator: time every public coroutine method as bot_db_operation_seconds,
+    labelled with the instance's backend when the call started. No-op when metrics are disabled.
+    """
+    if not METRICS_ENABLED:
+        return cls
+    for name, func in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(func):
+            continue
+        setattr(cls, name, _time_db_method(name, func))
+    return cls
+
+
+def _time_db_method(name, func):
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        backend = getattr(self, "backend", "")
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await func(self, *args, **kwargs)
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            db_seconds.observe(time.perf_counter() - started, name, backend, outcome)
+    return wrapper
+
+
+async def _timed(kind, name, coro):
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        return await coro
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        interaction_seconds.observe(time.perf_counter() - started, kind, name, outcome)
+
+
+# ---------- HOOKS ----------
+def install(bot):
+    """
+    Hook command invocation, view/modal dispatch and the HTTP client so every cog is
+    measured without per-callback changes. Does nothing when metrics are disabled.
+    """
+    if not METRICS_ENABLED or getattr(bot, "_metrics_installed", False):
+        return
+    bot._metrics_installed = True
+    from discord.ui.view import View
+    from discord.ui.modal import ModalStore
+
+    invoke = bot.invoke_application_command
+
+    async def invoke_application_command(ctx):
+        name = getattr(ctx.command, "qualified_name", None) or "unknown"
+        return await _timed("command", name, invoke(ctx))
+    bot.invoke_application_command = invoke_application_command
+
+    view_task = View._scheduled_task
+
+    async def _scheduled_task(self, item, interaction):
+        # Persistent views have stable custom_ids; others get random ones, so use class names
+        name = item.custom_id if self.is_persistent() else f"{type(self).__name__}.{type(item).__name__}"
+        return await _timed("component", name, view_task(self, item, interaction))
+    View._scheduled_task = _scheduled_task
+
+    modal_dispatch = ModalStore.dispatch
+
+    async def dispatch(self, user_id, custom_id, interaction):
+        modal = self._modals.get((user_id, custom_id))
+        if modal is None:
+            return await modal_dispatch(self, user_id, custom_id, interaction)
+        return await _timed("modal", type(modal).__name__, modal_dispatch(self, user_id, custom_id, interaction))
+    ModalStore.dispatch = dispatch
+
+    http_request = bot.http.request
+
+    async def request(route, **kwargs):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await http_request(route, **kwargs)
+        except BaseException as e:
+            status = str(getattr(e, "status", "error"))
+            raise
+        finally:
+            rest_seconds.observe(time.perf_counter() - started, route.method, route.path, status)
+    bot.http.request = request
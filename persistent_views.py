@@ -1,6 +1,6 @@
 # persistent_views.py
 from verification import VerificationPanelView, VerificationTicketView
-from tickets import TicketPanelView
+from tickets import TicketPanelView, TicketActionView
 from leaderboard import LeaderboardView
 
 
@@ -25,6 +25,9 @@ def register_persistent_views(bot):
         {"name": "Weekly Ultra Express"}
     ]))
 
+    # --- Ticket action buttons (Join / Submit Proof / Close) ---
+    bot.add_view(TicketActionView())
+
     # --- Leaderboard view ---
     bot.add_view(LeaderboardView(current_page=1, per_page=10))
 
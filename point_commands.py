@@ -16,12 +16,11 @@ class PointsModule(commands.Cog):
         points = ticket_info.get("points", 10)
         channel = ticket_info.get("embed_msg")  # optional: send reward message here
 
-        for uid in helpers:
-            try:
-                current = await db.get_points(uid)
-                await db.set_points(uid, current + points)
-            except Exception as e:
-                print(f"[PointsModule] Failed to reward user {uid}: {e}")
+        try:
+            await db.add_points_many({uid: points for uid in helpers}, reason="ticket_reward",
+                                     ticket_id=ticket_info.get("channel_id"))
+        except Exception as e:
+            print(f"[PointsModule] Failed to reward users {helpers}: {e}")
 
         if channel:
             try:
@@ -41,11 +40,19 @@ class PointsModule(commands.Cog):
             pts = await db.get_points(target.id)
         except Exception:
             pts = 0
+        try:
+            rank, total = await db.get_rank(target.id)
+        except Exception:
+            rank, total = None, 0
+
+        description = f"**{pts} points**"
+        if rank:
+            description += f"\nRank **#{rank}** of {total}"
 
         avatar = target.display_avatar.url if target.display_avatar else None
         embed = discord.Embed(
             title=f"🏅 Points for {target.display_name}",
-            description=f"**{pts} points**",
+            description=description,
             color=ACCENT
         )
         if avatar:
@@ -62,10 +69,24 @@ class PointsModule(commands.Cog):
     async def points_reset(self, ctx: discord.ApplicationContext):
         try:
             self._check_admin(ctx)
-            await db.reset_points()
-            await ctx.respond("✅ All points have been reset!")
         except commands.CheckFailure as e:
             await ctx.respond(str(e), ephemeral=True)
+            return
+
+        # Large Firestore resets run in batches, so defer and report progress
+        await ctx.defer()
+
+        async def progress(deleted):
+            try:
+                await ctx.edit(content=f"⏳ Resetting points... {deleted:,} entries removed")
+            except Exception:
+                pass
+
+        try:
+            await db.reset_points(progress=progress, actor_id=ctx.user.id)
+            await ctx.edit(content="✅ All points have been reset!")
+        except Exception:
+            await ctx.edit(content="Failed to reset points.")
 
     @commands.slash_command(name="points_add", description="Add points to a user (Admin only)")
     async def points_add(
@@ -85,8 +106,7 @@ class PointsModule(commands.Cog):
             return
 
         try:
-            current = await db.get_points(user.id)
-            await db.set_points(user.id, current + amount)
+            await db.add_points(user.id, amount, actor_id=ctx.user.id)
             await ctx.respond(f"✅ Added {amount} points to {user.mention}.")
         except Exception:
             await ctx.respond("Failed to update points.", ephemeral=True)
@@ -109,8 +129,7 @@ class PointsModule(commands.Cog):
             return
 
         try:
-            current = await db.get_points(user.id)
-            await db.set_points(user.id, max(0, current - amount))
+            await db.add_points(user.id, -amount, actor_id=ctx.user.id)
             await ctx.respond(f"✅ Removed {amount} points from {user.mention}.")
         except Exception:
             await ctx.respond("Failed to update points.", ephemeral=True)
@@ -133,7 +152,7 @@ class PointsModule(commands.Cog):
             return
 
         try:
-            await db.set_points(user.id, amount)
+            await db.set_points(user.id, amount, actor_id=ctx.user.id)
             await ctx.respond(f"✅ Set {user.mention}'s points to {amount}.")
         except Exception:
             await ctx.respond("Failed to update points.", ephemeral=True)
@@ -151,11 +170,47 @@ class PointsModule(commands.Cog):
             return
 
         try:
-            await db.delete_user_points(user.id)
+            await db.delete_user_points(user.id, actor_id=ctx.user.id)
             await ctx.respond(f"✅ Removed {user.mention} from the leaderboard.")
         except Exception:
             await ctx.respond("Failed to remove user.", ephemeral=True)
 
+    @commands.slash_command(name="points_history", description="Show where a user's points came from (Admin only)")
+    async def points_history(
+        self,
+        ctx: discord.ApplicationContext,
+        user: discord.Option(discord.User, "User"),
+    ):
+        try:
+            self._check_admin(ctx)
+        except commands.CheckFailure as e:
+            await ctx.respond(str(e), ephemeral=True)
+            return
+
+        try:
+            entries = await db.get_points_history(user.id, limit=15)
+        except Exception:
+            await ctx.respond("Failed to load points history.", ephemeral=True)
+            return
+
+        lines = []
+        for entry in entries:
+            balance = entry["balance"] if entry["balance"] is not None else "?"
+            line = f"<t:{int(entry['created_at'])}:d> **{entry['delta']:+}** → {balance} · {entry['reason']}"
+            if entry.get("ticket_id"):
+                line += f" · ticket {entry['ticket_id']}"
+            if entry.get("actor_id"):
+                line += f" · by <@{entry['actor_id']}>"
+            lines.append(line)
+
+        embed = discord.Embed(
+            title=f"📒 Points history for {user.display_name}",
+            description="\n".join(lines) if lines else "No ledger entries.",
+            color=ACCENT
+        )
+        embed.set_footer(text="Newest first; older entries are folded into checkpoints")
+        await ctx.respond(embed=embed, ephemeral=True)
+
 
 # ----------------- SETUP FUNCTION -----------------
 def setup(bot: commands.Bot):
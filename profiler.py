@@ -0,0 +1,288 @@
+# profiler.py
+import asyncio
+import contextvars
+import cProfile
+import heapq
+import io
+import itertools
+import math
+import os
+import pstats
+import time
+from collections import deque
+from datetime import datetime
+
+import discord
+from discord.ext import commands
+
+from roles import is_admin
+
+PROFILE_ON_START = os.getenv("PROFILE", "0").lower() in ("1", "true", "yes")
+PROFILE_SAMPLES = 2000  # durations kept per callsite for percentiles
+PROFILE_SLOWEST = 3  # slowest traces kept per entry point
+PROFILE_MAX_SPANS = 200  # spans kept per trace
+
+_trace = contextvars.ContextVar("profile_trace", default=None)
+_depth = contextvars.ContextVar("profile_depth", default=0)
+_seq = itertools.count()
+
+
+class _Trace:
+    __slots__ = ("callsite", "started", "wall", "duration", "spans")
+
+    def __init__(self, callsite):
+        self.callsite = callsite
+        self.started = time.perf_counter()
+        self.wall = time.time()
+        self.duration = 0.0
+        self.spans = []  # (offset, duration, depth, callsite)
+
+
+def _percentile(values, p):
+    return values[max(0, math.ceil(p * len(values)) - 1)] if values else 0.0
+
+
+class Profiler:
+    """
+    Runtime-switchable span profiler. While active it wraps interaction entry points,
+    Database methods and Discord REST calls; when inactive nothing is patched.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.window_started = None
+        self._patches = []  # (owner, name, original, owner had its own attribute)
+        self._stats = {}  # callsite -> [count, recent durations, slowest-trace heap]
+        self._cprofile = None
+        self._cprofile_text = None
+        self._window_task = None
+
+    # ---------- RECORDING ----------
+    def _observe(self, callsite, duration, trace=None):
+        entry = self._stats.get(callsite)
+        if entry is None:
+            entry = self._stats[callsite] = [0, deque(maxlen=PROFILE_SAMPLES), []]
+        entry[0] += 1
+        entry[1].append(duration)
+        if trace is not None:
+            heap = entry[2]
+            item = (duration, next(_seq), trace)
+            if len(heap) < PROFILE_SLOWEST:
+                heapq.heappush(heap, item)
+            elif duration > heap[0][0]:
+                heapq.heapreplace(heap, item)
+
+    async def root(self, callsite, coro):
+        """Time an entry point (command, button, modal) as its own trace."""
+        trace = _Trace(callsite)
+        token = _trace.set(trace)
+        try:
+            return await coro
+        finally:
+            trace.duration = time.perf_counter() - trace.started
+            _trace.reset(token)
+            self._observe(callsite, trace.duration, trace)
+
+    async def span(self, callsite, coro):
+        """Time a nested operation and attach it to the current trace, if any."""
+        trace = _trace.get()
+        depth = _depth.get()
+        token = _depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            duration = time.perf_counter() - started
+            _depth.reset(token)
+            self._observe(callsite, duration)
+            if trace is not None and len(trace.spans) < PROFILE_MAX_SPANS:
+                trace.spans.append((started - trace.started, duration, depth, callsite))
+
+    def record_span(self, callsite, duration):
+        """Attach a duration measured elsewhere (e.g. a queue wait that just ended)."""
+        self._observe(callsite, duration)
+        trace = _trace.get()
+        if trace is not None and len(trace.spans) < PROFILE_MAX_SPANS:
+            offset = time.perf_counter() - duration - trace.started
+            trace.spans.append((offset, duration, _depth.get(), callsite))
+
+    # ---------- SWITCHING ----------
+    def _patch(self, owner, name, make_wrapper):
+        original = getattr(owner, name)
+        own = name in vars(owner)
+        setattr(owner, name, make_wrapper(original))
+        self._patches.append((owner, name, original, own))
+
+    def enable(self, bot, cprofile=False):
+        if self.active:
+            return
+        from discord.ui.view import View
+        from discord.ui.modal import ModalStore
+        from database import Database
+
+        self._stats.clear()
+        self._cprofile_text = None
+        self.window_started = time.time()
+        self.active = True
+        profiler = self
+
+        def wrap_command(original):
+            async def invoke_application_command(ctx):
+                name = getattr(ctx.command, "qualified_name", None) or "unknown"
+                return await profiler.root(f"command:{name}", original(ctx))
+            return invoke_application_command
+        self._patch(bot, "invoke_application_command", wrap_command)
+
+        def wrap_view(original):
+            async def _scheduled_task(view, item, interaction):
+                name = item.custom_id if view.is_persistent() else f"{type(view).__name__}.{type(item).__name__}"
+                return await profiler.root(f"component:{name}", original(view, item, interaction))
+            return _scheduled_task
+        self._patch(View, "_scheduled_task", wrap_view)
+
+        def wrap_modal(original):
+            async def dispatch(store, user_id, custom_id, interaction):
+                modal = store._modals.get((user_id, custom_id))
+                name = type(modal).__name__ if modal else "unknown"
+                return await profiler.root(f"modal:{name}", original(store, user_id, custom_id, interaction))
+            return dispatch
+        self._patch(ModalStore, "dispatch", wrap_modal)
+
+        def wrap_http(original):
+            async def request(route, **kwargs):
+                return await profiler.span(f"rest:{route.method} {route.path}", original(route, **kwargs))
+            return request
+        self._patch(bot.http, "request", wrap_http)
+
+        def wrap_db(name):
+            def make(original):
+                async def method(db_self, *args, **kwargs):
+                    return await profiler.span(f"db:{name}[{db_self.backend}]", original(db_self, *args, **kwargs))
+                return method
+            return make
+        for name, func in list(vars(Database).items()):
+            if not name.startswith("_") and asyncio.iscoroutinefunction(func):
+                self._patch(Database, name, wrap_db(name))
+
+        def wrap_fs(original):
+            async def _fs_call(db_self, name, op):
+                return await profiler.span(f"firestore:{name}", original(db_self, name, op))
+            return _fs_call
+        self._patch(Database, "_fs_call", wrap_fs)
+
+        if cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        print(f"[Profiler] Enabled{' with cProfile' if cprofile else ''}")
+
+    def disable(self):
+        if not self.active:
+            return
+        for owner, name, original, own in reversed(self._patches):
+            if own:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        self._patches.clear()
+        if self._cprofile:
+            self._cprofile.disable()
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(60)
+            self._cprofile_text = out.getvalue()
+            self._cprofile = None
+        self.active = False
+        print("[Profiler] Disabled")
+
+    async def run_window(self, bot, seconds, cprofile, channel):
+        """Profile for a fixed window, then post the report files to channel."""
+        self.enable(bot, cprofile=cprofile)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.disable()
+        await channel.send("📈 Profiling window finished.", files=self.report_files())
+
+    # ---------- REPORT ----------
+    def report(self):
+        now = time.time()
+        started = self.window_started or now
+        lines = [
+            f"Profiling window: {datetime.fromtimestamp(started):%Y-%m-%d %H:%M:%S} "
+            f"({now - started:.1f}s{', still running' if self.active else ''})",
+            "",
+            f"{'callsite':<60} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}",
+        ]
+        rows = []
+        for callsite, (count, durations, _) in self._stats.items():
+            values = sorted(durations)
+            rows.append((_percentile(values, 0.95), callsite, count, values))
+        for p95, callsite, count, values in sorted(rows, reverse=True):
+            lines.append(
+                f"{callsite[:60]:<60} {count:>7} {_percentile(values, 0.5) * 1000:>9.1f} {p95 * 1000:>9.1f} "
+                f"{_percentile(values, 0.99) * 1000:>9.1f} {values[-1] * 1000:>9.1f}"
+            )
+
+        lines += ["", "=== Slowest traces ==="]
+        traces = [item for entry in self._stats.values() for item in entry[2]]
+        for duration, _, trace in sorted(traces, key=lambda item: item[0], reverse=True):
+            lines.append("")
+            lines.append(f"{trace.callsite}  {duration * 1000:.1f} ms  at "
+                         f"{datetime.fromtimestamp(trace.wall):%H:%M:%S}")
+            covered = 0.0
+            end = 0.0
+            for offset, span_duration, depth, callsite in sorted(trace.spans):
+                lines.append(f"  {'  ' * depth}+{offset * 1000:8.1f} ms  {callsite}  {span_duration * 1000:.1f} ms")
+                if depth == 0:
+                    # Union of top-level spans, so parallel work is not double counted
+                    covered += max(0.0, offset + span_duration - max(offset, end))
+                    end = max(end, offset + span_duration)
+            lines.append(f"  own code / untraced: {max(0.0, duration - covered) * 1000:.1f} ms")
+        return "\n".join(lines) + "\n"
+
+    def report_files(self):
+        files = [discord.File(io.BytesIO(self.report().encode("utf-8")), filename="profile-report.txt")]
+        if self._cprofile_text:
+            files.append(discord.File(io.BytesIO(self._cprofile_text.encode("utf-8")), filename="cprofile.txt"))
+        return files
+
+
+profiler = Profiler()
+
+
+class ProfilingModule(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        if PROFILE_ON_START:
+            profiler.enable(bot)
+
+    @commands.slash_command(name="profile", description="Start, stop or report runtime profiling (Admin only)")
+    async def profile(
+        self,
+        ctx: discord.ApplicationContext,
+        action: discord.Option(str, "What to do", choices=["start", "stop", "report"]),
+        seconds: discord.Option(int, "Window length for start; 0 runs until stopped", required=False, default=60),
+        cprofile: discord.Option(bool, "Also run cProfile during the window", required=False, default=False)
+    ):
+        if not is_admin(ctx.user):
+            await ctx.respond("You do not have permission.", ephemeral=True)
+            return
+
+        if action == "start":
+            if profiler.active:
+                await ctx.respond("Profiling is already running.", ephemeral=True)
+                return
+            if seconds > 0:
+                profiler._window_task = asyncio.create_task(
+                    profiler.run_window(self.bot, seconds, cprofile, ctx.channel)
+                )
+                await ctx.respond(f"⏱️ Profiling for {seconds}s; the report will be posted here.", ephemeral=True)
+            else:
+                profiler.enable(self.bot, cprofile=cprofile)
+                await ctx.respond("⏱️ Profiling started. Use `/profile stop` to finish.", ephemeral=True)
+        elif action == "stop":
+            if profiler._window_task and not profiler._window_task.done():
+                profiler._window_task.cancel()
+            profiler.disable()
+            await ctx.respond("📈 Profiling stopped.", files=profiler.report_files(), ephemeral=True)
+        else:
+            await ctx.respond(files=profiler.report_files(), ephemeral=True)
@@ -0,0 +1,162 @@
+# rank_index.py
+import random
+
+MAX_LEVEL = 24  # enough for ~16M users at p=0.5
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level
+
+
+class RankIndex:
+    """
+    Indexable skip list of (-points, user_id) keys.
+    Rank lookup, insert, remove and the start of a top-K slice are O(log n).
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.version = 0
+        self.clear()
+
+    def clear(self):
+        self._head = _Node(None, MAX_LEVEL)
+        self._points = {}
+        self.loaded = False
+        self.version += 1
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, user_id):
+        return int(user_id) in self._points
+
+    # ---------- BULK LOAD ----------
+    def load(self, rows):
+        """Build the index from (user_id, points) rows in O(n log n) for the sort, O(n) for linking."""
+        self.clear()
+        for uid, pts in rows:
+            self._points[int(uid)] = int(pts)
+        keys = sorted((-pts, uid) for uid, pts in self._points.items())
+        last = [self._head] * MAX_LEVEL
+        last_pos = [0] * MAX_LEVEL
+        for pos, key in enumerate(keys, start=1):
+            node = _Node(key, self._random_level())
+            for level in range(len(node.next)):
+                prev = last[level]
+                prev.next[level] = node
+                prev.width[level] = pos - last_pos[level]
+                last[level] = node
+                last_pos[level] = pos
+        for level in range(MAX_LEVEL):
+            last[level].width[level] = len(keys) + 1 - last_pos[level]
+        self.loaded = True
+
+    # ---------- MUTATIONS ----------
+    def set(self, user_id, points):
+        user_id, points = int(user_id), int(points)
+        old = self._points.get(user_id)
+        if old == points:
+            return
+        if old is not None:
+            self._remove_key((-old, user_id))
+        self._insert_key((-points, user_id))
+        self._points[user_id] = points
+        self.version += 1
+
+    def add(self, user_id, delta):
+        """Apply a delta the same way Database.add_points_many does (clamped at zero)."""
+        self.set(user_id, max(0, self._points.get(int(user_id), 0) + int(delta)))
+
+    def remove(self, user_id):
+        user_id = int(user_id)
+        old = self._points.pop(user_id, None)
+        if old is None:
+            return
+        self._remove_key((-old, user_id))
+        self.version += 1
+
+    # ---------- QUERIES ----------
+    def points(self, user_id):
+        return self._points.get(int(user_id))
+
+    def rank(self, user_id):
+        """1-based leaderboard position of user_id, or None if they have no points row."""
+        pts = self._points.get(int(user_id))
+        if pts is None:
+            return None
+        key = (-pts, int(user_id))
+        node = self._head
+        pos = 0
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key <= key:
+                pos += node.width[level]
+                node = node.next[level]
+        return pos if node.key == key else None
+
+    def page(self, offset, limit):
+        """(user_id, points) rows for ranks offset+1 .. offset+limit."""
+        offset, limit = max(0, int(offset)), max(0, int(limit))
+        if offset >= len(self._points) or not limit:
+            return []
+        node = self._head
+        remaining = offset + 1
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        rows = []
+        while node is not None and len(rows) < limit:
+            rows.append((node.key[1], -node.key[0]))
+            node = node.next[0]
+        return rows
+
+    # ---------- SKIP LIST INTERNALS ----------
+    @staticmethod
+    def _random_level():
+        level = 1
+        while level < MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find_chain(self, key):
+        chain = [None] * MAX_LEVEL
+        steps = [0] * MAX_LEVEL
+        node = self._head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def _insert_key(self, key):
+        chain, steps_at_level = self._find_chain(key)
+        node = _Node(key, self._random_level())
+        steps = 0
+        for level in range(len(node.next)):
+            prev = chain[level]
+            node.next[level] = prev.next[level]
+            prev.next[level] = node
+            node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(len(node.next), MAX_LEVEL):
+            chain[level].width[level] += 1
+
+    def _remove_key(self, key):
+        chain, _ = self._find_chain(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            return
+        for level in range(len(node.next)):
+            prev = chain[level]
+            prev.width[level] += node.width[level] - 1
+            prev.next[level] = node.next[level]
+        for level in range(len(node.next), MAX_LEVEL):
+            chain[level].width[level] -= 1
@@ -0,0 +1,257 @@
+# rest_scheduler.py
+import asyncio
+import bisect
+import contextvars
+import itertools
+import os
+import time
+from collections import deque
+
+import discord
+
+from metrics import registry
+from profiler import profiler
+
+# Priority classes, lowest value runs first
+PRIORITY_USER = 0  # a user is waiting on it: ticket/verification creates, joins
+PRIORITY_CLOSE = 1  # ticket close permission revokes
+PRIORITY_CLEANUP = 2  # channel deletes, warm pool refills
+
+REST_MAX_INFLIGHT = int(os.getenv("REST_MAX_INFLIGHT", "8"))
+REST_MAX_RETRIES = 3  # re-queues after a 429 before the error reaches the caller
+MAX_IDLE_BUCKETS = 1000
+
+# Starting (capacity, seconds per full refill) per route kind until Discord tells us otherwise
+DEFAULT_BUCKETS = {
+    "create_channel": (5, 10.0),
+    "set_permissions": (5, 5.0),
+    "delete_channel": (5, 5.0),
+    "edit_channel": (2, 600.0),  # Discord allows two renames per channel per 10 minutes
+}
+
+
+class _Bucket:
+    __slots__ = ("capacity", "per", "tokens", "updated", "blocked_until")
+
+    def __init__(self, capacity, per):
+        self.capacity = capacity
+        self.per = per
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self, now):
+        """Seconds until a request on this route may start."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / self.per)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.per / self.capacity
+
+    def learn(self, headers, now):
+        """Adopt Discord's X-RateLimit-* / Retry-After values for this bucket."""
+        limit = headers.get("X-RateLimit-Limit")
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        retry_after = headers.get("Retry-After")
+        if limit:
+            self.capacity = max(1, int(limit))
+        if remaining is not None:
+            self.tokens = min(float(remaining), self.capacity)
+        if reset_after and remaining is not None and int(remaining) == 0:
+            self.per = max(float(reset_after), 0.1)
+            self.blocked_until = max(self.blocked_until, now + float(reset_after))
+        if retry_after:
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, now + float(retry_after))
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "route", "func", "future", "enqueued", "attempts", "context")
+
+    def __init__(self, priority, seq, route, func):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.func = func
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+        self.attempts = 0
+        # While profiling, run in the caller's context so its trace sees the call; otherwise skip the copy
+        self.context = contextvars.copy_context() if profiler.active else None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RestScheduler:
+    """
+    Single queue for guild-mutating REST calls. Jobs start in priority order, each route
+    is throttled by a token bucket, and a 429 re-queues the job instead of failing the caller.
+    """
+
+    def __init__(self, max_inflight=REST_MAX_INFLIGHT):
+        self.max_inflight = max(1, max_inflight)
+        self._queue = []  # _Jobs kept sorted by (priority, seq)
+        self._buckets = {}  # (kind, id) -> _Bucket
+        self._learned = dict(DEFAULT_BUCKETS)  # kind -> (capacity, per), updated from headers
+        self._seq = itertools.count()
+        self._inflight = 0
+        self._wakeup = None
+        self._dispatcher = None
+        self._waits = deque(maxlen=500)  # recent queue waits in seconds
+        self.stats_counters = {"submitted": 0, "completed": 0, "failed": 0, "rate_limited": 0, "max_depth": 0}
+        self._wait_hist = registry.histogram(
+            "bot_rest_queue_wait_seconds", "Time guild REST calls spent queued in the scheduler", ("kind", "priority"))
+
+    # ---------- PUBLIC CALLS ----------
+    async def create_text_channel(self, guild, priority=PRIORITY_USER, on_queued=None, **kwargs):
+        return await self.submit(("create_channel", guild.id), lambda: guild.create_text_channel(**kwargs),
+                                 priority, on_queued)
+
+    async def set_permissions(self, channel, target, priority=PRIORITY_USER, **kwargs):
+        return await self.submit(("set_permissions", channel.id), lambda: channel.set_permissions(target, **kwargs),
+                                 priority)
+
+    async def edit_channel(self, channel, priority=PRIORITY_USER, **kwargs):
+        return await self.submit(("edit_channel", channel.id), lambda: channel.edit(**kwargs), priority)
+
+    async def delete_channel(self, channel, priority=PRIORITY_CLEANUP, reason=None):
+        return await self.submit(("delete_channel", channel.id), lambda: channel.delete(reason=reason), priority)
+
+    async def submit(self, route, func, priority=PRIORITY_USER, on_queued=None):
+        """
+        Run func() (a coroutine factory) once its route has capacity. If other jobs are ahead,
+        on_queued(position) is called once so the caller can tell the user where they stand.
+        """
+        job = _Job(priority, next(self._seq), route, func)
+        bisect.insort(self._queue, job)
+        self.stats_counters["submitted"] += 1
+        self.stats_counters["max_depth"] = max(self.stats_counters["max_depth"], len(self._queue))
+        if on_queued and not self._can_start_now(job):
+            asyncio.create_task(self._notify(on_queued, self._queue.index(job) + 1))
+        self._kick()
+        return await job.future
+
+    # ---------- DISPATCH ----------
+    def _kick(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        elif self._wakeup:
+            self._wakeup.set()
+
+    def _can_start_now(self, job):
+        ahead = self._queue.index(job)
+        if self._inflight + ahead >= self.max_inflight:
+            return False
+        bucket = self._bucket(job.route)
+        same_route = sum(1 for other in self._queue[:ahead] if other.route == job.route)
+        return bucket.delay(time.monotonic()) <= 0 and bucket.tokens >= same_route + 1
+
+    def _bucket(self, route):
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            if len(self._buckets) >= MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                self._buckets = {r: b for r, b in self._buckets.items() if b.delay(now) > 0}
+            bucket = self._buckets[route] = _Bucket(*self._learned.get(route[0], (5, 5.0)))
+        return bucket
+
+    async def _dispatch(self):
+        # Runs while jobs are queued; submit() and finished jobs restart or wake it
+        self._wakeup = asyncio.Event()
+        while self._queue:
+            self._wakeup.clear()
+            now = time.monotonic()
+            next_wait = None
+            started = False
+            if self._inflight < self.max_inflight:
+                for job in self._queue:
+                    delay = self._bucket(job.route).delay(now)
+                    if delay <= 0:
+                        self._queue.remove(job)
+                        self._start(job, now)
+                        started = True
+                        break
+                    next_wait = delay if next_wait is None else min(next_wait, delay)
+            if started:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=next_wait)
+            except asyncio.TimeoutError:
+                pass
+        self._wakeup = None
+
+    def _start(self, job, now):
+        self._bucket(job.route).tokens -= 1
+        self._inflight += 1
+        if job.attempts == 0:
+            self._waits.append(now - job.enqueued)
+            self._wait_hist.observe(now - job.enqueued, job.route[0], job.priority)
+            if profiler.active and job.context is not None:
+                job.context.run(profiler.record_span, f"queue:{job.route[0]}", now - job.enqueued)
+        asyncio.create_task(self._run(job), context=job.context)
+
+    async def _run(self, job):
+        try:
+            result = await job.func()
+        except discord.HTTPException as e:
+            headers = getattr(getattr(e, "response", None), "headers", None) or {}
+            if headers:
+                self._learn(job.route, headers)
+            if e.status == 429 and job.attempts < REST_MAX_RETRIES:
+                self.stats_counters["rate_limited"] += 1
+                job.attempts += 1
+                bisect.insort(self._queue, job)
+                print(f"[RestScheduler] 429 on {job.route[0]}, re-queued (attempt {job.attempts})")
+            else:
+                self.stats_counters["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+        except Exception as e:
+            self.stats_counters["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.stats_counters["completed"] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._inflight -= 1
+            self._kick()
+
+    def _learn(self, route, headers):
+        bucket = self._bucket(route)
+        bucket.learn(headers, time.monotonic())
+        self._learned[route[0]] = (bucket.capacity, bucket.per)
+
+    @staticmethod
+    async def _notify(on_queued, position):
+        try:
+            await on_queued(position)
+        except Exception as e:
+            print(f"[RestScheduler] Queue position callback failed: {e}")
+
+    # ---------- METRICS ----------
+    def stats(self):
+        waits = sorted(self._waits)
+        depth_by_priority = {}
+        for job in self._queue:
+            depth_by_priority[job.priority] = depth_by_priority.get(job.priority, 0) + 1
+        return {
+            **self.stats_counters,
+            "queue_depth": len(self._queue),
+            "depth_by_priority": depth_by_priority,
+            "inflight": self._inflight,
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+            "learned": dict(self._learned),
+        }
+
+
+rest_scheduler = RestScheduler()
+registry.gauge("bot_rest_queue_depth", "Guild REST calls waiting in the scheduler", lambda: len(rest_scheduler._queue))
+registry.gauge("bot_rest_inflight", "Guild REST calls currently running", lambda: rest_scheduler._inflight)
@@ -1,5 +1,11 @@
+import io
 import re
+import time
 import random
+import asyncio
+import contextlib
+from collections import deque
+from datetime import datetime, timezone
 import discord
 from discord.ext import commands
 from discord.ui import View, Button, Modal, InputText
@@ -8,10 +14,31 @@ from roles import is_admin, is_staff, is_helper, is_restricted
 from utils import bot_can_manage_channels, generate_ticket_transcript
 from config import DEFAULT_HELPER_SLOTS, DEFAULT_POINT_VALUES
 from database import db  # make sure your db supports async get_points/set_points
+from transcript import build_transcript_files, close_transcript_files
+from rest_scheduler import rest_scheduler, PRIORITY_USER, PRIORITY_CLOSE, PRIORITY_CLEANUP
+from channel_pool import TicketChannelPool
+from metrics import registry
 
-# Active tickets
+# Active tickets (in-memory view of the durable `tickets` store, keyed by channel id)
 active_tickets = {}
 
+
+async def load_active_tickets():
+    """Reload every open ticket from the database in one query."""
+    tickets = await db.get_open_tickets()
+    active_tickets.clear()
+    for ticket in tickets:
+        active_tickets[int(ticket["channel_id"])] = ticket
+    return len(tickets)
+
+
+async def save_ticket(ticket_info):
+    """Write a ticket's state through to the database; the in-memory dict stays authoritative."""
+    try:
+        await db.save_ticket(ticket_info)
+    except Exception as e:
+        print(f"[Tickets] Failed to persist ticket {ticket_info.get('channel_id')}: {e}")
+
 # ---------------- BOSS SELECTION ----------------
 DAILY_4MAN_BOSSES = [
     "UltraEzrajal", "UltraWarden", "UltraEngineer",
@@ -41,6 +68,171 @@ CATEGORY_CHANNEL_PREFIX = {
     "Weekly Ultra Express": "Weekly"
 }
 
+# Warm pool of hidden pre-created channels (sizes in config.py; disabled by default)
+ticket_pool = TicketChannelPool(CATEGORY_CHANNEL_PREFIX)
+
+# ---------------- TICKET EMBED ----------------
+def build_ticket_embed(ticket_info):
+    """Render the ticket embed from its stored state, including the current helper list."""
+    category = ticket_info.get("category", "Unknown")
+    number = ticket_info.get("random_number")
+    embed = discord.Embed(
+        title=f"{category} Ticket",
+        description=f"Requester: <@{ticket_info['requestor']}>\n"
+                    f"**In-game name:** {ticket_info.get('in_game') or '—'}\n"
+                    f"**Concerns:** {ticket_info.get('concerns') or '—'}",
+        color=0x5865F2
+    )
+
+    # Add bosses and /join numbers
+    if category == "Daily 4-Man Express":
+        for boss in DAILY_4MAN_BOSSES:
+            embed.add_field(name=boss, value=f"/join {boss}-{number}", inline=False)
+    elif category == "Daily 7-Man Express":
+        for boss, cmds in DAILY_7MAN_BOSSES.items():
+            for cmd in cmds:
+                embed.add_field(name=boss, value=f"/join {cmd}-{number}", inline=False)
+    elif category == "Weekly Ultra Express":
+        for boss in WEEKLY_ULTRA_BOSSES:
+            embed.add_field(name=boss, value=f"/join {boss}-{number}", inline=False)
+
+    helpers = [h for h in ticket_info.get("helpers", []) if h]
+    slots = len(ticket_info.get("helpers", []))
+    helpers_text = ", ".join(f"<@{h}>" for h in helpers) if helpers else "None"
+    embed.add_field(name=f"Helpers ({len(helpers)}/{slots})", value=helpers_text, inline=False)
+    if ticket_info.get("proof_submitted"):
+        embed.add_field(name="Proof", value="✅ Submitted", inline=False)
+    return embed
+
+
+async def update_ticket_embed(channel, ticket_info):
+    """Re-render the ticket embed and buttons in place via the stored message id (no history fetch)."""
+    message_id = ticket_info.get("embed_message_id")
+    if not message_id:
+        return
+    view = TicketActionView(ticket_info["requestor"], close_disabled=not ticket_info.get("proof_submitted"))
+    try:
+        await channel.get_partial_message(message_id).edit(embed=build_ticket_embed(ticket_info), view=view)
+    except Exception as e:
+        print(f"[Tickets] Failed to update embed for ticket {ticket_info.get('channel_id')}: {e}")
+
+
+# ---------------- EMBED UPDATER ----------------
+EMBED_UPDATE_DELAY = 0.25  # gather near-simultaneous clicks into the first edit
+EMBED_UPDATE_WINDOW = 1.0  # at most one edit per ticket channel per window
+
+
+class TicketEmbedUpdater:
+    """
+    Coalesces ticket embed edits per channel.
+    Callers mark a ticket dirty; one task per channel sends at most one edit per window,
+    rendered from the ticket's latest state at send time. Message edits share a
+    per-channel rate-limit bucket, so spacing is tracked per channel.
+    """
+
+    def __init__(self, delay=EMBED_UPDATE_DELAY, window=EMBED_UPDATE_WINDOW):
+        self.delay = delay
+        self.window = window
+        self._pending = {}  # channel_id -> (channel, ticket_info)
+        self._tasks = {}  # channel_id -> flush task
+        self._last_edit = {}  # channel_id -> monotonic time of last edit
+        self.stats = {"requested": 0, "sent": 0}
+
+    def schedule(self, channel, ticket_info):
+        # Callers schedule after releasing the ticket lock, so the ticket may have closed since
+        if active_tickets.get(channel.id) is not ticket_info:
+            return
+        self.stats["requested"] += 1
+        self._pending[channel.id] = (channel, ticket_info)
+        task = self._tasks.get(channel.id)
+        if task is None or task.done():
+            self._tasks[channel.id] = asyncio.create_task(self._run(channel.id))
+
+    async def _run(self, channel_id):
+        try:
+            await asyncio.sleep(self.delay)
+            while channel_id in self._pending:
+                wait = self._last_edit.get(channel_id, 0) + self.window - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                # forget() may have dropped the ticket while we waited out the window
+                entry = self._pending.pop(channel_id, None)
+                if entry is None:
+                    break
+                channel, ticket_info = entry
+                self._last_edit[channel_id] = time.monotonic()
+                await update_ticket_embed(channel, ticket_info)
+                self.stats["sent"] += 1
+        finally:
+            self._tasks.pop(channel_id, None)
+
+    def forget(self, channel_id):
+        """Drop pending edits and timing for a ticket that is closing."""
+        self._pending.pop(channel_id, None)
+        self._last_edit.pop(channel_id, None)
+
+
+embed_updater = TicketEmbedUpdater()
+
+
+# ---------------- PER-TICKET LOCKS ----------------
+class TicketLocks:
+    """
+    One asyncio.Lock per ticket channel: join, kick, proof and close on the same ticket
+    run one at a time, different tickets run in parallel. Callbacks must look the ticket
+    up again after acquiring, since a close may have started while they waited. Close only
+    holds the lock to mark the ticket "closing"; its pipeline runs unlocked.
+    """
+
+    def __init__(self):
+        self._locks = {}
+        self.stats = {}  # channel_id -> {"acquired", "contended", "wait_total", "wait_max"}
+        self.recently_closed = deque(maxlen=50)  # (channel_id, stats) kept after forget()
+        self.totals = {"acquired": 0, "contended": 0, "wait_total": 0.0, "wait_max": 0.0}
+        self._acquired = registry.counter(
+            "bot_ticket_lock_acquisitions_total", "Per-ticket lock acquisitions", ("contended",))
+        self._wait_hist = registry.histogram(
+            "bot_ticket_lock_wait_seconds", "Time spent waiting for a per-ticket lock",
+            buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+
+    @contextlib.asynccontextmanager
+    async def hold(self, channel_id):
+        lock = self._locks.setdefault(channel_id, asyncio.Lock())
+        contended = lock.locked()
+        started = time.perf_counter()
+        async with lock:
+            self._record(channel_id, contended, time.perf_counter() - started)
+            yield
+
+    def _record(self, channel_id, contended, wait):
+        stats = self.stats.get(channel_id)
+        if stats is None:
+            stats = self.stats[channel_id] = {"acquired": 0, "contended": 0, "wait_total": 0.0, "wait_max": 0.0}
+        for entry in (stats, self.totals):
+            entry["acquired"] += 1
+            entry["contended"] += int(contended)
+            entry["wait_total"] += wait
+            entry["wait_max"] = max(entry["wait_max"], wait)
+        self._acquired.inc("yes" if contended else "no")
+        self._wait_hist.observe(wait)
+
+    def forget(self, channel_id):
+        # Waiters keep their reference to the old lock; they will find the ticket gone
+        self._locks.pop(channel_id, None)
+        stats = self.stats.pop(channel_id, None)
+        if stats is not None:
+            self.recently_closed.append((channel_id, stats))
+
+    def hot_tickets(self, limit=10):
+        """Open and recently closed tickets with the most contended acquisitions, hottest first."""
+        candidates = list(self.stats.items()) + list(self.recently_closed)
+        ranked = sorted(candidates, key=lambda item: (item[1]["contended"], item[1]["wait_max"]), reverse=True)
+        return ranked[:limit]
+
+
+ticket_locks = TicketLocks()
+
+
 # ---------------- PANEL VIEW ----------------
 class TicketPanelView(View):
     def __init__(self, categories):
@@ -66,6 +258,8 @@ class TicketModal(Modal):
     async def callback(self, interaction: discord.Interaction):
         in_game = self.children[0].value
         concerns = self.children[1].value or "—"
+        # Channel creation can queue behind other tickets at reset time
+        await interaction.response.defer(ephemeral=True)
 
         # Random number for /join commands
         number = random.randint(1000, 99999)
@@ -78,49 +272,60 @@ class TicketModal(Modal):
             interaction.user: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
         }
 
-        ch = await interaction.guild.create_text_channel(
-            name=channel_name,
-            overwrites=overwrites,
-            reason=f"Ticket for {interaction.user}"
-        )
+        async def notify_queued(position):
+            await interaction.followup.send(
+                f"⏳ Lots of tickets are being opened right now — you're #{position} in line. "
+                "Your channel will be created shortly.",
+                ephemeral=True
+            )
 
-        # Ticket embed
-        embed = discord.Embed(
-            title=f"{self.category_name} Ticket",
-            description=f"Requester: {interaction.user.mention}\n**In-game name:** {in_game}\n**Concerns:** {concerns}",
-            color=0x5865F2
-        )
-
-        # Add bosses and /join numbers
-        if self.category_name == "Daily 4-Man Express":
-            for boss in DAILY_4MAN_BOSSES:
-                embed.add_field(name=boss, value=f"/join {boss}-{number}", inline=False)
-        elif self.category_name == "Daily 7-Man Express":
-            for boss, cmds in DAILY_7MAN_BOSSES.items():
-                for cmd in cmds:
-                    embed.add_field(name=boss, value=f"/join {cmd}-{number}", inline=False)
-        elif self.category_name == "Weekly Ultra Express":
-            for boss in WEEKLY_ULTRA_BOSSES:
-                embed.add_field(name=boss, value=f"/join {boss}-{number}", inline=False)
-
-        # Ticket buttons view (Close button starts disabled)
-        view = TicketActionView(interaction.user.id)
-        await ch.send(embed=embed, view=view)
+        try:
+            ch = await ticket_pool.claim(
+                interaction.guild, self.category_name, channel_name, overwrites, reason=f"Ticket for {interaction.user}"
+            )
+            if ch is None:
+                # Same placement as pool channels, so claimed and freshly created tickets sit together
+                ch = await rest_scheduler.create_text_channel(
+                    interaction.guild,
+                    priority=PRIORITY_USER,
+                    on_queued=notify_queued,
+                    name=channel_name,
+                    category=await ticket_pool.parent_category(interaction.guild),
+                    overwrites=overwrites,
+                    reason=f"Ticket for {interaction.user}"
+                )
+        except Exception as e:
+            print(f"[Tickets] Failed to create ticket channel for {interaction.user}: {e}")
+            await interaction.followup.send(
+                "⚠️ Discord is busy and your ticket could not be created. Please try again in a minute.",
+                ephemeral=True
+            )
+            return
 
         # Store ticket info
         slots = DEFAULT_HELPER_SLOTS.get(self.category_name, 1)
         points = DEFAULT_POINT_VALUES.get(self.category_name, 5)
-        active_tickets[ch.id] = {
+        ticket_info = {
             "category": self.category_name,
             "requestor": interaction.user.id,
             "helpers": [None] * slots,
             "points": points,
             "channel_id": ch.id,
             "random_number": number,
-            "proof_submitted": False
+            "proof_submitted": False,
+            "in_game": in_game,
+            "concerns": concerns
         }
 
-        await interaction.response.send_message(f"✅ Ticket created: {ch.mention}", ephemeral=True)
+        # Ticket buttons view (Close button starts disabled)
+        view = TicketActionView(interaction.user.id)
+        msg = await ch.send(embed=build_ticket_embed(ticket_info), view=view)
+
+        ticket_info["embed_message_id"] = msg.id
+        active_tickets[ch.id] = ticket_info
+        await save_ticket(ticket_info)
+
+        await interaction.followup.send(f"✅ Ticket created: {ch.mention}", ephemeral=True)
 
 # ---------------- TICKET BUTTONS VIEW ----------------
 class JoinButton(Button):
@@ -128,94 +333,145 @@ class JoinButton(Button):
         super().__init__(label="Join Ticket", style=discord.ButtonStyle.green, custom_id="join_ticket")
 
     async def callback(self, interaction: discord.Interaction):
-        ticket_info = active_tickets.get(interaction.channel.id)
-        if not ticket_info:
-            await interaction.response.send_message("No active ticket found.", ephemeral=True)
-            return
-        if interaction.user.id == ticket_info["requestor"]:
-            await interaction.response.send_message("You cannot join your own ticket.", ephemeral=True)
-            return
-        if interaction.user.id in [h for h in ticket_info["helpers"] if h]:
-            await interaction.response.send_message("You are already helping this ticket.", ephemeral=True)
+        # Only the slot claim runs under the lock; Discord calls happen after it is released
+        error = None
+        async with ticket_locks.hold(interaction.channel.id):
+            ticket_info = active_tickets.get(interaction.channel.id)
+            if not ticket_info:
+                error = "No active ticket found."
+            elif ticket_info.get("closing"):
+                error = "This ticket is being closed."
+            elif interaction.user.id == ticket_info["requestor"]:
+                error = "You cannot join your own ticket."
+            elif interaction.user.id in [h for h in ticket_info["helpers"] if h]:
+                error = "You are already helping this ticket."
+            else:
+                # Add helper to first empty slot
+                slot = next((i for i, h in enumerate(ticket_info["helpers"]) if h is None), None)
+                if slot is None:
+                    error = "This ticket is already full."
+                else:
+                    ticket_info["helpers"][slot] = interaction.user.id
+                    await save_ticket(ticket_info)
+
+        if error:
+            await interaction.response.send_message(error, ephemeral=True)
             return
-
-        # Add helper to first empty slot
-        for i in range(len(ticket_info["helpers"])):
-            if ticket_info["helpers"][i] is None:
-                ticket_info["helpers"][i] = interaction.user.id
-                break
-
-        try:
-            await interaction.channel.set_permissions(interaction.user, view_channel=True, send_messages=True)
-        except Exception:
-            pass
+        await interaction.response.send_message("✅ You joined the ticket.", ephemeral=True)
 
         # Update the ticket embed to reflect new helpers
-        async for msg in interaction.channel.history(limit=20):
-            if msg.embeds:
-                embed = msg.embeds[0]
-                if "Helpers:" in embed.description:
-                    helpers = [h for h in ticket_info["helpers"] if h]
-                    helpers_text = ", ".join(f"<@{h}>" for h in helpers) if helpers else "None"
-                    lines = embed.description.splitlines()
-                    for i, line in enumerate(lines):
-                        if line.startswith("Helpers:"):
-                            lines[i] = f"Helpers: {helpers_text}"
-                    embed.description = "\n".join(lines)
-                    await msg.edit(embed=embed)
-                    break
+        embed_updater.schedule(interaction.channel, ticket_info)
 
-        await interaction.response.send_message("✅ You joined the ticket.", ephemeral=True)
+        try:
+            await rest_scheduler.set_permissions(
+                interaction.channel, interaction.user, priority=PRIORITY_USER, view_channel=True, send_messages=True
+            )
+        except Exception as e:
+            print(f"[Tickets] Failed to grant {interaction.user} access to ticket {interaction.channel.id}: {e}")
 
 
-# ---------------- CLOSE TICKET ----------------
-class CloseTicketButton(Button):
-    def __init__(self, requestor_id, disabled=True):
-        super().__init__(label="Close Ticket", style=discord.ButtonStyle.red, custom_id="close_ticket", disabled=disabled)
-        self.requestor_id = requestor_id
+class ProofButton(Button):
+    def __init__(self):
+        super().__init__(label="Submit Proof", style=discord.ButtonStyle.blurple, custom_id="submit_proof")
 
     async def callback(self, interaction: discord.Interaction):
-        ticket_info = active_tickets.get(interaction.channel.id)
-        if not ticket_info:
+        if interaction.channel.id not in active_tickets:
             await interaction.response.send_message("No active ticket found.", ephemeral=True)
             return
+        await interaction.response.send_modal(ProofModal(interaction.channel.id))
+
+
+class TicketActionView(View):
+    """Join / Submit Proof / Close buttons. Fixed custom_ids so the view can be registered as persistent."""
+
+    def __init__(self, requestor_id=None, close_disabled=True):
+        super().__init__(timeout=None)
+        self.add_item(JoinButton())
+        self.add_item(ProofButton())
+        self.add_item(CloseTicketButton(requestor_id, disabled=close_disabled))
 
-        if not ticket_info.get("proof_submitted", False):
-            await interaction.response.send_message("You must submit proof before closing the ticket.", ephemeral=True)
-            return
 
-        if not (interaction.user.id == ticket_info["requestor"] or is_staff(interaction.user) or is_admin(interaction.user)):
-            await interaction.response.send_message("Only staff/admin or requestor can close this ticket.", ephemeral=True)
+# ---------------- CLOSE PIPELINE ----------------
+CLOSE_STAGE_RETRIES = 2
+CLOSE_RETRY_DELAY = 0.5  # seconds, grows linearly per attempt
+close_timings = deque(maxlen=100)  # per-stage seconds for recent closes
+
+
+async def _run_stage(name, func, ticket_info, timings):
+    """Run one close stage with retries; completed stages are skipped if the close is retried."""
+    done = ticket_info.setdefault("close_stages", [])
+    if name in done:
+        return
+    started = time.perf_counter()
+    for attempt in range(CLOSE_STAGE_RETRIES + 1):
+        try:
+            await func()
+            break
+        except Exception as e:
+            if attempt == CLOSE_STAGE_RETRIES:
+                timings[name] = time.perf_counter() - started
+                raise RuntimeError(f"{name} stage: {e}") from e
+            print(f"[Tickets] Close stage {name} failed (attempt {attempt + 1}), retrying: {e}")
+            await asyncio.sleep(CLOSE_RETRY_DELAY * (attempt + 1))
+    timings[name] = time.perf_counter() - started
+    done.append(name)
+
+
+async def run_close_pipeline(interaction, ticket_info):
+    """
+    Close a ticket: revoke access, reward helpers and send the transcript concurrently,
+    then post the closed embed and drop the ticket. Returns per-stage timings.
+    """
+    channel = interaction.channel
+    guild = interaction.guild
+    points = ticket_info.get("points", 5)
+    rewarded_helpers = [h for h in ticket_info["helpers"] if h]
+    timings = {}
+
+    revoke_pending = {u for u in ticket_info["helpers"] + [ticket_info["requestor"]] if u}
+
+    async def _revoke_one(user_id):
+        member = guild.get_member(user_id)
+        if member:
+            await rest_scheduler.set_permissions(
+                channel, member, priority=PRIORITY_CLOSE, view_channel=False, send_messages=False
+            )
+        revoke_pending.discard(user_id)
+
+    async def revoke():
+        results = await asyncio.gather(*[_revoke_one(u) for u in list(revoke_pending)], return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise errors[0]
+
+    async def reward():
+        # The flag skips the write on retries; the ledger keys rewards by ticket, so a lost flag
+        # (failed save or restart before it) still can't pay the helpers twice
+        if ticket_info.get("rewarded"):
             return
+        await db.add_points_many({helper_id: points for helper_id in rewarded_helpers}, reason="ticket_reward",
+                                 ticket_id=channel.id, actor_id=interaction.user.id)
+        ticket_info["rewarded"] = True
+        await save_ticket(ticket_info)
 
-        # Remove permissions for helpers/requestor
-        for user_id in ticket_info["helpers"] + [ticket_info["requestor"]]:
-            if user_id:
-                member = interaction.guild.get_member(user_id)
-                if member:
-                    try:
-                        await interaction.channel.set_permissions(member, view_channel=False, send_messages=False)
-                    except Exception:
-                        pass
-
-        # Reward helpers
-        points = ticket_info.get("points", 5)
-        rewarded_helpers = []
-        for helper_id in ticket_info["helpers"]:
-            if helper_id:
-                current = await db.get_points(helper_id)
-                await db.set_points(helper_id, current + points)
-                rewarded_helpers.append(helper_id)
-
-        # Generate transcript
-        transcript_channel = interaction.guild.get_channel(1357314848253542570)
-        if transcript_channel:
-            await generate_ticket_transcript(ticket_info, rewarded=True, closer_id=interaction.user.id, destination=transcript_channel)
-
-        # Create detailed closed ticket embed
+    async def transcript():
+        files, message_count = await build_transcript_files(channel, ticket_info, rewarded=True, closer_id=interaction.user.id)
+        try:
+            try:
+                await db.archive_transcript(ticket_info, files[0].fp, closer_id=interaction.user.id, message_count=message_count)
+            except Exception as e:
+                print(f"[Tickets] Failed to archive transcript for {channel.id}: {e}")
+            files[0].fp.seek(0)
+            transcript_channel = guild.get_channel(1357314848253542570)
+            if transcript_channel:
+                await generate_ticket_transcript(ticket_info, rewarded=True, closer_id=interaction.user.id,
+                                                 destination=transcript_channel, files=files)
+        finally:
+            close_transcript_files(files)
+
+    async def announce():
         helpers_text = ", ".join(f"<@{h}>" for h in rewarded_helpers) if rewarded_helpers else "None"
-        proof_text = ticket_info.get("proof", "No proof submitted")
-
+        proof_text = ticket_info.get("proof") or "No proof submitted"
         embed = discord.Embed(
             title=f"{ticket_info['category']} Ticket (Closed)",
             description=f"**Requestor:** <@{ticket_info['requestor']}>\n"
@@ -224,13 +480,73 @@ class CloseTicketButton(Button):
                         f"**Proof submitted:** {proof_text}",
             color=0x5865F2
         )
-        view = DeleteTicketView(interaction.channel.id)
-        await interaction.channel.send(embed=embed, view=view)
+        await channel.send(embed=embed, view=DeleteTicketView(channel.id))
+
+    async def cleanup():
+        active_tickets.pop(channel.id, None)
+        embed_updater.forget(channel.id)
+        ticket_locks.forget(channel.id)
+        await db.delete_ticket(channel.id)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        _run_stage("revoke", revoke, ticket_info, timings),
+        _run_stage("reward", reward, ticket_info, timings),
+        _run_stage("transcript", transcript, ticket_info, timings),
+        return_exceptions=True,
+    )
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        close_timings.append(timings)
+        raise errors[0]
+    await _run_stage("announce", announce, ticket_info, timings)
+    await _run_stage("cleanup", cleanup, ticket_info, timings)
+    timings["total"] = time.perf_counter() - started
+    close_timings.append(timings)
+    print(f"[Tickets] Closed ticket {channel.id}: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+    return timings
 
-        # Remove ticket from active list
-        active_tickets.pop(interaction.channel.id, None)
 
-        await interaction.response.send_message("✅ Ticket closed successfully.", ephemeral=True)
+# ---------------- CLOSE TICKET ----------------
+class CloseTicketButton(Button):
+    def __init__(self, requestor_id, disabled=True):
+        super().__init__(label="Close Ticket", style=discord.ButtonStyle.red, custom_id="close_ticket", disabled=disabled)
+        self.requestor_id = requestor_id
+
+    async def callback(self, interaction: discord.Interaction):
+        # Acknowledge before waiting on the lock: a join or proof may hold it briefly
+        await interaction.response.defer(ephemeral=True)
+        # The lock only covers the checks and marking the ticket as closing; the pipeline's REST
+        # and transcript stages run after it is released, and other actions refuse a closing ticket
+        error = None
+        async with ticket_locks.hold(interaction.channel.id):
+            ticket_info = active_tickets.get(interaction.channel.id)
+            if not ticket_info:
+                error = "This ticket is already closed."
+            elif ticket_info.get("closing"):
+                error = "This ticket is already being closed."
+            elif not ticket_info.get("proof_submitted", False):
+                error = "You must submit proof before closing the ticket."
+            elif not (interaction.user.id == ticket_info["requestor"] or is_staff(interaction.user) or is_admin(interaction.user)):
+                error = "Only staff/admin or requestor can close this ticket."
+            else:
+                ticket_info["closing"] = True
+
+        if error:
+            await interaction.followup.send(error, ephemeral=True)
+            return
+
+        try:
+            await run_close_pipeline(interaction, ticket_info)
+        except Exception as e:
+            ticket_info.pop("closing", None)
+            await interaction.followup.send(
+                f"⚠️ Closing failed: {e}\nClick Close again to retry; helpers will not be rewarded twice.",
+                ephemeral=True
+            )
+            return
+
+        await interaction.followup.send("✅ Ticket closed successfully.", ephemeral=True)
 
 # ---------------- DELETE BUTTON ----------------
 class DeleteTicketView(View):
@@ -247,8 +563,11 @@ class DeleteTicketButton(Button):
         if not (is_staff(interaction.user) or is_admin(interaction.user)):
             await interaction.response.send_message("Only staff/admin can delete this channel.", ephemeral=True)
             return
+        await interaction.response.send_message("Deleting ticket channel...", ephemeral=True)
         try:
-            await interaction.channel.delete(reason=f"Ticket deleted by {interaction.user}")
+            await rest_scheduler.delete_channel(
+                interaction.channel, priority=PRIORITY_CLEANUP, reason=f"Ticket deleted by {interaction.user}"
+            )
         except Exception:
             pass
 
@@ -261,15 +580,29 @@ class ProofModal(Modal):
         self.add_item(InputText(label="Description (optional)", required=False))
 
     async def callback(self, interaction: discord.Interaction):
-        ticket_info = active_tickets.get(self.channel_id)
+        proof_url = self.children[0].value or None
+        description = self.children[1].value or "—"
+        async with ticket_locks.hold(self.channel_id):
+            ticket_info = active_tickets.get(self.channel_id)
+            if ticket_info and ticket_info.get("closing"):
+                await interaction.response.send_message("This ticket is being closed.", ephemeral=True)
+                return
+            if ticket_info:
+                ticket_info["proof_submitted"] = True
+                # Left empty, the proof stays None so archive searches can tell real proof apart
+                ticket_info["proof"] = proof_url or self.children[1].value or None
+                await save_ticket(ticket_info)
+
         if not ticket_info:
             await interaction.response.send_message("Ticket not found.", ephemeral=True)
             return
+        await interaction.response.send_message(
+            "✅ Proof submitted successfully. You can now close the ticket.",
+            ephemeral=True
+        )
 
-        ticket_info["proof_submitted"] = True
-        proof_url = self.children[0].value or None
-        description = self.children[1].value or "—"
-        ticket_info["proof"] = proof_url or description
+        # Show proof on the embed and enable the Close button
+        embed_updater.schedule(interaction.channel, ticket_info)
 
         proof_channel = interaction.guild.get_channel(1357332638838558862)
         if proof_channel:
@@ -280,23 +613,25 @@ class ProofModal(Modal):
             else:
                 await proof_channel.send(f"**Proof submitted by:** {interaction.user.mention}\n**Description:** {description}")
 
-        # Enable Close button
-        if interaction.message.components:
-            for row in interaction.message.components:
-                for child in row.children:
-                    if getattr(child, "custom_id", None) == "close_ticket":
-                        child.disabled = False
-            await interaction.message.edit(view=interaction.message.components)
-
-        await interaction.response.send_message(
-            "✅ Proof submitted successfully. You can now close the ticket.",
-            ephemeral=True
-        )
-
 # ---------------- TICKET COG ----------------
 class TicketModule(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.tickets_loaded = False
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # on_ready fires again after reconnects; only reload once
+        if self.tickets_loaded:
+            return
+        try:
+            count = await load_active_tickets()
+            self.tickets_loaded = True
+            print(f"[Tickets] Restored {count} open tickets")
+        except Exception as e:
+            print(f"[Tickets] Failed to restore open tickets: {e}")
+        for guild in self.bot.guilds:
+            await ticket_pool.start(guild)
 
     @commands.slash_command(name="panel", description="Deploy ticket panel (staff/admin only)")
     async def panel(self, ctx: discord.ApplicationContext):
@@ -339,40 +674,143 @@ class TicketModule(commands.Cog):
             await ctx.respond("Only staff/admin can remove helpers.", ephemeral=True)
             return
 
-        ticket_info = active_tickets.get(ctx.channel.id)
-        if not ticket_info:
-            await ctx.respond("This channel is not an active ticket.", ephemeral=True)
-            return
+        # The lock can be busy with another ticket action; acknowledge before waiting on it
+        await ctx.defer(ephemeral=True)
+
+        # Only the helper change runs under the lock; Discord calls happen after it is released
+        error = None
+        async with ticket_locks.hold(ctx.channel.id):
+            ticket_info = active_tickets.get(ctx.channel.id)
+            if not ticket_info:
+                error = "This channel is not an active ticket."
+            elif ticket_info.get("closing"):
+                error = "This ticket is being closed."
+            elif member.id not in ticket_info["helpers"]:
+                error = f"{member.mention} is not a helper in this ticket."
+            else:
+                # Remove helper
+                ticket_info["helpers"] = [h if h != member.id else None for h in ticket_info["helpers"]]
+                await save_ticket(ticket_info)
 
-        if member.id not in ticket_info["helpers"]:
-            await ctx.respond(f"{member.mention} is not a helper in this ticket.", ephemeral=True)
+        if error:
+            await ctx.respond(error, ephemeral=True)
             return
+        await ctx.respond(f"✅ {member.mention} has been removed from this ticket.", ephemeral=True)
 
-        # Remove helper
-        ticket_info["helpers"] = [h if h != member.id else None for h in ticket_info["helpers"]]
+        # Update ticket embed
+        embed_updater.schedule(ctx.channel, ticket_info)
 
         # Revoke channel permissions
         try:
-            await ctx.channel.set_permissions(member, overwrite=None)
-        except Exception:
-            pass
+            await rest_scheduler.set_permissions(ctx.channel, member, priority=PRIORITY_USER, overwrite=None)
+        except Exception as e:
+            print(f"[Tickets] Failed to revoke {member} from ticket {ctx.channel.id}: {e}")
 
-        # Update ticket embed (if it contains a Helpers: line)
-        async for msg in ctx.channel.history(limit=20):
-            if msg.embeds:
-                embed = msg.embeds[0]
-                if "Helpers:" in embed.description:
-                    helpers = [h for h in ticket_info["helpers"] if h]
-                    helpers_text = ", ".join(f"<@{h}>" for h in helpers) if helpers else "None"
-                    lines = embed.description.splitlines()
-                    for i, line in enumerate(lines):
-                        if line.startswith("Helpers:"):
-                            lines[i] = f"Helpers: {helpers_text}"
-                    embed.description = "\n".join(lines)
-                    await msg.edit(embed=embed)
-                    break
+    @commands.slash_command(name="ticket_pool", description="Show warm ticket channel pool status (staff/admin only)")
+    async def ticket_pool_status(self, ctx: discord.ApplicationContext):
+        if not (is_staff(ctx.user) or is_admin(ctx.user)):
+            await ctx.respond("Only staff/admin can view the ticket pool.", ephemeral=True)
+            return
 
-        await ctx.respond(f"✅ {member.mention} has been removed from this ticket.", ephemeral=True)
+        report = ticket_pool.report(ctx.guild.id)
+        lines = [f"**{category}:** {ready}/{target} ready" for category, (ready, target) in report["categories"].items()]
+        embed = discord.Embed(title="🔥 Warm Ticket Pool", description="\n".join(lines), color=0x5865F2)
+        embed.add_field(
+            name="Claims",
+            value=f"{report['hits']} hits / {report['misses']} misses ({report['hit_rate']:.0%} hit rate)",
+            inline=False
+        )
+        embed.add_field(name="Channels", value=f"{report['created']} created, {report['reclaimed']} reclaimed", inline=False)
+        await ctx.respond(embed=embed, ephemeral=True)
+
+    @commands.slash_command(name="ticket_locks", description="Show per-ticket lock contention (staff/admin only)")
+    async def ticket_locks_status(self, ctx: discord.ApplicationContext):
+        if not (is_staff(ctx.user) or is_admin(ctx.user)):
+            await ctx.respond("Only staff/admin can view lock contention.", ephemeral=True)
+            return
+
+        totals = ticket_locks.totals
+        avg_wait = totals["wait_total"] / totals["acquired"] if totals["acquired"] else 0.0
+        lines = []
+        for channel_id, stats in ticket_locks.hot_tickets():
+            if not stats["contended"]:
+                break
+            state = "" if channel_id in active_tickets else " (closed)"
+            lines.append(f"<#{channel_id}>{state}: {stats['contended']}/{stats['acquired']} contended, "
+                         f"max wait {stats['wait_max'] * 1000:.0f} ms")
+        embed = discord.Embed(
+            title="🔒 Ticket Lock Contention",
+            description="\n".join(lines) if lines else "No contended tickets.",
+            color=0x5865F2
+        )
+        embed.add_field(
+            name="Since start",
+            value=f"{totals['contended']}/{totals['acquired']} acquisitions contended, "
+                  f"avg wait {avg_wait * 1000:.1f} ms, max {totals['wait_max'] * 1000:.0f} ms",
+            inline=False
+        )
+        await ctx.respond(embed=embed, ephemeral=True)
+
+    @commands.slash_command(
+        name="transcript_search",
+        description="Search archived ticket transcripts (staff/admin only)"
+    )
+    async def transcript_search(
+        self,
+        ctx: discord.ApplicationContext,
+        helper: discord.Option(discord.User, "Tickets this helper worked", required=False),
+        requestor: discord.Option(discord.User, "Tickets opened by this user", required=False),
+        category: discord.Option(str, "Ticket category", choices=list(CATEGORY_CHANNEL_PREFIX), required=False),
+        month: discord.Option(str, "Closed in this month (YYYY-MM)", required=False),
+        has_proof: discord.Option(bool, "Only tickets with (or without) proof", required=False),
+        ticket: discord.Option(str, "Ticket channel ID to retrieve the full transcript", required=False)
+    ):
+        if not (is_staff(ctx.user) or is_admin(ctx.user)):
+            await ctx.respond("Only staff/admin can search transcripts.", ephemeral=True)
+            return
+
+        if ticket:
+            text = await db.get_archived_transcript(int(ticket)) if ticket.isdigit() else None
+            if text is None:
+                await ctx.respond("No archived transcript for that ticket.", ephemeral=True)
+                return
+            file = discord.File(io.BytesIO(text.encode("utf-8")), filename=f"transcript-{ticket}.txt")
+            await ctx.respond(file=file, ephemeral=True)
+            return
+
+        since = until = None
+        if month:
+            try:
+                start = datetime.strptime(month, "%Y-%m").replace(tzinfo=timezone.utc)
+            except ValueError:
+                await ctx.respond("Month must look like 2025-03.", ephemeral=True)
+                return
+            end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+            since, until = start.timestamp(), end.timestamp()
+
+        results = await db.search_transcripts(
+            helper=helper.id if helper else None,
+            requestor=requestor.id if requestor else None,
+            category=category, since=since, until=until, has_proof=has_proof, limit=15
+        )
+        if not results:
+            await ctx.respond("No archived tickets match.", ephemeral=True)
+            return
+
+        lines = []
+        for r in results:
+            helpers_text = ", ".join(f"<@{h}>" for h in r["helpers"]) or "None"
+            lines.append(
+                f"`{r['ticket_id']}` **{r['category']}** — <t:{int(r['closed_at'])}:d>\n"
+                f"Requestor: <@{r['requestor']}> · Helpers: {helpers_text} · Proof: {'✅' if r['proof'] not in (None, '—') else '❌'}"
+            )
+        embed = discord.Embed(
+            title=f"🗂️ Archived Tickets ({len(results)})",
+            description="\n".join(lines),
+            color=0x5865F2
+        )
+        embed.set_footer(text="Use the ticket option with an ID to get the full transcript")
+        await ctx.respond(embed=embed, ephemeral=True)
 
 
 async def setup(bot):
@@ -1,10 +1,141 @@
 import discord
+import gzip
+import html
+import tempfile
 from datetime import datetime
-from io import StringIO
 
 TRANSCRIPT_CHANNEL_ID = 1357314848253542570  # hardcoded destination channel
+SPOOL_MAX_BYTES = 1024 * 1024  # transcripts larger than this spill from memory to a temp file
 
-async def generate_ticket_transcript(ticket_info, rewarded=False, closer_id=None):
+HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body{{font-family:Segoe UI,Helvetica,Arial,sans-serif;background:#313338;color:#dbdee1;margin:0;padding:24px}}
+header{{border-bottom:1px solid #4e5058;margin-bottom:16px;padding-bottom:12px}}
+header dt{{font-weight:600;float:left;clear:left;width:110px}}
+.msg{{padding:6px 0;border-bottom:1px solid #2b2d31}}
+.meta{{color:#949ba4;font-size:12px}}
+.author{{color:#f2f3f5;font-weight:600;margin-right:6px}}
+.content{{white-space:pre-wrap;word-wrap:break-word}}
+.attachment,.embed{{margin:6px 0 0 0;padding:6px 10px;background:#2b2d31;border-left:4px solid #5865f2;border-radius:4px}}
+.embed .title{{font-weight:600}}
+.embed .field{{margin-top:4px}}
+img{{max-width:400px;display:block;margin-top:4px}}
+</style></head><body>
+"""
+
+
+class _TranscriptWriter:
+    """Encodes text incrementally into a spooled temp file, optionally gzip-compressed."""
+
+    def __init__(self, filename, compress=False):
+        self.file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        self._sink = gzip.GzipFile(fileobj=self.file, mode="wb") if compress else self.file
+        self.filename = filename + (".gz" if compress else "")
+
+    def write(self, text):
+        self._sink.write(text.encode("utf-8"))
+
+    def to_file(self):
+        if self._sink is not self.file:
+            self._sink.close()  # writes the gzip trailer; leaves self.file open
+        self.file.seek(0)
+        return discord.File(self.file, filename=self.filename)
+
+
+def _text_message(msg):
+    lines = [f"[{msg.created_at.strftime('%Y-%m-%d %H:%M:%S')}] {msg.author}: {msg.content}\n"]
+    for a in msg.attachments:
+        lines.append(f"    [attachment] {a.filename} ({a.size} bytes) {a.url}\n")
+    for e in msg.embeds:
+        lines.append(f"    [embed] {e.title or ''} {e.description or ''}".rstrip() + "\n")
+        for field in e.fields:
+            lines.append(f"        {field.name}: {field.value}\n")
+    return "".join(lines)
+
+
+def _html_message(msg):
+    esc = html.escape
+    parts = [
+        '<div class="msg"><div class="meta">',
+        f'<span class="author">{esc(str(msg.author))}</span>',
+        f'{msg.created_at.strftime("%Y-%m-%d %H:%M:%S")} UTC</div>',
+        f'<div class="content">{esc(msg.content or "")}</div>',
+    ]
+    for a in msg.attachments:
+        parts.append(
+            f'<div class="attachment"><a href="{esc(a.url)}">{esc(a.filename)}</a> '
+            f'<span class="meta">{a.size} bytes, {esc(a.content_type or "unknown type")}</span>'
+        )
+        if (a.content_type or "").startswith("image/"):
+            parts.append(f'<img src="{esc(a.url)}" alt="{esc(a.filename)}">')
+        parts.append("</div>")
+    for e in msg.embeds:
+        parts.append('<div class="embed">')
+        if e.title:
+            parts.append(f'<div class="title">{esc(e.title)}</div>')
+        if e.description:
+            parts.append(f'<div class="content">{esc(e.description)}</div>')
+        for field in e.fields:
+            parts.append(f'<div class="field"><b>{esc(str(field.name))}</b><br>{esc(str(field.value))}</div>')
+        if e.image and e.image.url:
+            parts.append(f'<img src="{esc(e.image.url)}" alt="embed image">')
+        parts.append("</div>")
+    parts.append("</div>\n")
+    return "".join(parts)
+
+
+async def build_transcript_files(channel, ticket_info, rewarded=False, closer_id=None, compress=False):
+    """
+    Stream the channel's full history into a plain-text and an HTML transcript.
+    Returns ([text_file, html_file], message_count). Memory use is bounded by SPOOL_MAX_BYTES per file.
+    """
+    category = ticket_info.get("category", "Unknown")
+    helpers = [f"<@{h}>" for h in ticket_info.get("helpers", []) if h]
+    header = [
+        ("Requestor", f"<@{ticket_info.get('requestor')}>"),
+        ("Helpers", ", ".join(helpers) if helpers else "None"),
+        ("Opened at", str(channel.created_at if channel else "Unknown")),
+        ("Closed at", str(datetime.utcnow())),
+        ("Rewarded", "Yes" if rewarded else "No"),
+    ]
+    if closer_id:
+        header.append(("Closed by", f"<@{closer_id}>"))
+
+    text = _TranscriptWriter(f"transcript-{channel.name}.txt", compress)
+    page = _TranscriptWriter(f"transcript-{channel.name}.html", compress)
+
+    text.write(f"Ticket Transcript for {category}\n")
+    text.write("".join(f"{k}: {v}\n" for k, v in header))
+    text.write("\n--- Messages ---\n\n")
+    page.write(HTML_HEAD.format(title=html.escape(f"Ticket Transcript - {category}")))
+    page.write(f"<header><h2>Ticket Transcript for {html.escape(category)}</h2><dl>")
+    page.write("".join(f"<dt>{k}</dt><dd>{html.escape(v)}</dd>" for k, v in header))
+    page.write("</dl></header>\n")
+
+    # history(limit=None) pages through the whole channel 100 messages per request
+    count = 0
+    try:
+        async for msg in channel.history(limit=None, oldest_first=True):
+            text.write(_text_message(msg))
+            page.write(_html_message(msg))
+            count += 1
+    except Exception:
+        text.write("Could not fetch messages from channel.\n")
+        page.write('<p class="meta">Could not fetch messages from channel.</p>\n')
+
+    page.write(f'<p class="meta">{count} messages</p></body></html>\n')
+    return [text.to_file(), page.to_file()], count
+
+
+def close_transcript_files(files):
+    """Release the spooled temp files behind build_transcript_files' results (deleting any spilled to disk)."""
+    for f in files:
+        f.close()  # discord.File stubs out fp.close until this restores it
+        f.fp.close()
+
+
+async def generate_ticket_transcript(ticket_info, rewarded=False, closer_id=None, compress=False):
     """
     Generates a transcript of a ticket channel and sends it to the hardcoded destination channel.
     """
@@ -24,24 +155,9 @@ async def generate_ticket_transcript(ticket_info, rewarded=False, closer_id=None
     if not destination:
         return
 
-    transcript_text = f"Ticket Transcript for {ticket_info.get('category', 'Unknown')}\n"
-    transcript_text += f"Requestor: <@{ticket_info.get('requestor')}>\n"
-    helpers = [f"<@{h}>" for h in ticket_info.get("helpers", []) if h]
-    transcript_text += f"Helpers: {', '.join(helpers) if helpers else 'None'}\n"
-    transcript_text += f"Opened at: {channel.created_at if channel else 'Unknown'}\n"
-    transcript_text += f"Closed at: {datetime.utcnow()}\n"
-    transcript_text += f"Rewarded: {'Yes' if rewarded else 'No'}\n"
-    if closer_id:
-        transcript_text += f"Closed by: <@{closer_id}>\n"
-    transcript_text += "\n--- Messages ---\n\n"
-
-    # Fetch messages safely
+    # Send transcript as text and HTML files
+    files, _ = await build_transcript_files(channel, ticket_info, rewarded, closer_id, compress)
     try:
-        async for msg in channel.history(limit=1000, oldest_first=True):
-            transcript_text += f"[{msg.created_at.strftime('%Y-%m-%d %H:%M:%S')}] {msg.author}: {msg.content}\n"
-    except Exception:
-        transcript_text += "Could not fetch messages from channel.\n"
-
-    # Send transcript as a file
-    file = discord.File(StringIO(transcript_text), filename=f"transcript-{channel.name}.txt")
-    await destination.send(file=file)
+        await destination.send(files=files)
+    finally:
+        close_transcript_files(files)
@@ -0,0 +1,209 @@
+# transcript_archive.py
+import aiosqlite
+import asyncio
+import json
+import mmap
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+TRANSCRIPT_ARCHIVE_DIR = os.getenv("TRANSCRIPT_ARCHIVE_DIR", "transcript_archive")
+TRANSCRIPT_SEGMENT_BYTES = int(os.getenv("TRANSCRIPT_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+TRANSCRIPT_OPEN_SEGMENTS = 16  # memory maps kept open for reads
+
+
+class TranscriptArchive:
+    """
+    Append-only transcript store. Transcript bytes are appended to numbered segment files;
+    an SQLite index maps each ticket to (segment, offset, length) plus its searchable metadata.
+    """
+
+    def __init__(self, directory=TRANSCRIPT_ARCHIVE_DIR, segment_bytes=TRANSCRIPT_SEGMENT_BYTES):
+        self.dir = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.index = None
+        self._segment = 0
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self._maps = OrderedDict()  # segment -> mmap, least recently used first
+        self._maps_lock = threading.Lock()  # reads map segments on worker threads
+
+    async def open(self):
+        if self.index:
+            return
+        # Concurrent closes can race to open the archive; only the first connects
+        async with self._open_lock:
+            if self.index:
+                return
+            await self._open()
+
+    async def _open(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        index = await aiosqlite.connect(self.dir / "index.db")
+        try:
+            await self._create_schema(index)
+        except Exception:
+            await index.close()
+            raise
+        segments = sorted(int(p.stem.split("-")[1]) for p in self.dir.glob("segment-*.log"))
+        self._segment = segments[-1] if segments else 0
+        # Publish only once the schema exists, so the fast path in open() never sees a half-made index
+        self.index = index
+
+    @staticmethod
+    async def _create_schema(index):
+        await index.executescript("""
+        CREATE TABLE IF NOT EXISTS transcripts (
+            ticket_id INTEGER PRIMARY KEY,
+            category TEXT,
+            requestor INTEGER,
+            helpers TEXT,
+            closer_id INTEGER,
+            closed_at REAL NOT NULL,
+            proof TEXT,
+            points INTEGER,
+            message_count INTEGER,
+            segment INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS transcript_helpers (
+            helper_id INTEGER NOT NULL,
+            closed_at REAL NOT NULL,
+            ticket_id INTEGER NOT NULL,
+            PRIMARY KEY (helper_id, closed_at, ticket_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_transcripts_closed ON transcripts(closed_at);
+        CREATE INDEX IF NOT EXISTS idx_transcripts_requestor ON transcripts(requestor, closed_at);
+        CREATE INDEX IF NOT EXISTS idx_transcripts_category ON transcripts(category, closed_at);
+        """)
+        await index.commit()
+
+    async def close(self):
+        with self._maps_lock:
+            for mm in self._maps.values():
+                mm.close()
+            self._maps.clear()
+        if self.index:
+            await self.index.close()
+            self.index = None
+
+    def _segment_path(self, segment):
+        return self.dir / f"segment-{segment:05d}.log"
+
+    # ---------- WRITES ----------
+    async def append(self, ticket_info, fp, closed_at, closer_id=None, message_count=0):
+        """
+        Copy a transcript from file object fp into the current segment and index it.
+        Returns False if the ticket was already archived (so close retries are harmless).
+        """
+        ticket_id = int(ticket_info["channel_id"])
+        helpers = [int(h) for h in ticket_info.get("helpers", []) if h]
+        async with self._write_lock:
+            async with self.index.execute("SELECT 1 FROM transcripts WHERE ticket_id = ?", (ticket_id,)) as cursor:
+                if await cursor.fetchone():
+                    return False
+            segment, offset, length = await asyncio.to_thread(self._append_blocking, fp)
+            await self.index.execute(
+                "INSERT INTO transcripts(ticket_id, category, requestor, helpers, closer_id, closed_at, proof, "
+                "points, message_count, segment, offset, length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ticket_id, ticket_info.get("category"), int(ticket_info.get("requestor") or 0), json.dumps(helpers),
+                 closer_id, closed_at, ticket_info.get("proof"), int(ticket_info.get("points", 0)),
+                 message_count, segment, offset, length)
+            )
+            await self.index.executemany(
+                "INSERT OR IGNORE INTO transcript_helpers(helper_id, closed_at, ticket_id) VALUES (?, ?, ?)",
+                [(h, closed_at, ticket_id) for h in set(helpers)]
+            )
+            await self.index.commit()
+        return True
+
+    def _append_blocking(self, fp):
+        path = self._segment_path(self._segment)
+        if path.exists() and path.stat().st_size >= self.segment_bytes:
+            self._segment += 1
+            path = self._segment_path(self._segment)
+        with open(path, "ab") as out:
+            offset = out.tell()
+            shutil.copyfileobj(fp, out, 1024 * 1024)
+            length = out.tell() - offset
+            out.flush()
+            os.fsync(out.fileno())
+        return self._segment, offset, length
+
+    # ---------- READS ----------
+    async def read(self, ticket_id):
+        """The archived transcript text for a ticket, or None."""
+        async with self.index.execute(
+            "SELECT segment, offset, length FROM transcripts WHERE ticket_id = ?", (int(ticket_id),)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if not row:
+            return None
+        data = await asyncio.to_thread(self._read_blocking, *row)
+        return data.decode("utf-8", errors="replace")
+
+    def _read_blocking(self, segment, offset, length):
+        with self._maps_lock:
+            mm = self._maps.get(segment)
+            if mm is None or len(mm) < offset + length:
+                # The active segment grows after it is mapped; remap to see the new tail
+                if mm is not None:
+                    mm.close()
+                with open(self._segment_path(segment), "rb") as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mm
+                while len(self._maps) > TRANSCRIPT_OPEN_SEGMENTS:
+                    self._maps.popitem(last=False)[1].close()
+            self._maps.move_to_end(segment)
+            return mm[offset:offset + length]
+
+    async def search(self, helper=None, requestor=None, category=None, since=None, until=None,
+                     has_proof=None, limit=25):
+        """Newest-first ticket metadata matching every given filter. since/until are unix timestamps."""
+        if helper is not None:
+            sql = ("SELECT t.ticket_id, t.category, t.requestor, t.helpers, t.closer_id, t.closed_at, t.proof, "
+                   "t.points, t.message_count FROM transcript_helpers h "
+                   "JOIN transcripts t ON t.ticket_id = h.ticket_id WHERE h.helper_id = ?")
+            params = [int(helper)]
+            closed_col = "h.closed_at"
+        else:
+            sql = ("SELECT t.ticket_id, t.category, t.requestor, t.helpers, t.closer_id, t.closed_at, t.proof, "
+                   "t.points, t.message_count FROM transcripts t WHERE 1 = 1")
+            params = []
+            closed_col = "t.closed_at"
+        if requestor is not None:
+            sql += " AND t.requestor = ?"
+            params.append(int(requestor))
+        if category:
+            sql += " AND t.category = ?"
+            params.append(category)
+        if since is not None:
+            sql += f" AND {closed_col} >= ?"
+            params.append(since)
+        if until is not None:
+            sql += f" AND {closed_col} < ?"
+            params.append(until)
+        if has_proof is not None:
+            # Tickets archived before empty proofs were stored as NULL hold the "—" placeholder
+            sql += " AND t.proof IS NOT NULL AND t.proof != '—'" if has_proof else " AND (t.proof IS NULL OR t.proof = '—')"
+        sql += f" ORDER BY {closed_col} DESC LIMIT ?"
+        params.append(int(limit))
+        async with self.index.execute(sql, params) as cursor:
+            rows = await cursor.fetchall()
+        return [
+            {
+                "ticket_id": row[0],
+                "category": row[1],
+                "requestor": row[2],
+                "helpers": json.loads(row[3] or "[]"),
+                "closer_id": row[4],
+                "closed_at": row[5],
+                "proof": row[6],
+                "points": row[7],
+                "message_count": row[8],
+            }
+            for row in rows
+        ]
@@ -5,7 +5,7 @@ async def bot_can_manage_channels(bot, guild):
     """Check if the bot has Manage Channels permission in the guild."""
     return guild.me.guild_permissions.manage_channels
 
-async def generate_ticket_transcript(ticket_info, rewarded=False, closer_id=None, destination=None):
+async def generate_ticket_transcript(ticket_info, rewarded=False, closer_id=None, destination=None, files=None):
     """
     Send a ticket transcript to a specified channel.
     
@@ -14,6 +14,7 @@ async def generate_ticket_transcript(ticket_info, rewarded=False, closer_id=None
         rewarded (bool): Whether points were rewarded to helpers.
         closer_id (int, optional): User ID of who closed the ticket.
         destination (discord.TextChannel, optional): Channel to send the transcript to.
+        files (list[discord.File], optional): Full transcript files to attach to the summary.
     """
     if not destination:
         return
@@ -22,7 +23,7 @@ async def generate_ticket_transcript(ticket_info, rewarded=False, closer_id=None
     if not helpers_list:
         helpers_list = ["None"]
 
-    proof_text = ticket_info.get("proof", "No proof submitted")
+    proof_text = ticket_info.get("proof") or "No proof submitted"
     points = ticket_info.get("points", 5)
     
     description_lines = [
@@ -40,4 +41,4 @@ async def generate_ticket_transcript(ticket_info, rewarded=False, closer_id=None
     description = "\n".join(description_lines)
 
     embed = discord.Embed(title="🎫 Ticket Transcript", description=description, color=0x5865F2)
-    await destination.send(embed=embed)
+    await destination.send(embed=embed, files=files)
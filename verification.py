@@ -4,6 +4,7 @@ from discord.ext import commands
 from discord.ui import View, Modal, InputText
 from datetime import datetime
 from database import db
+from rest_scheduler import rest_scheduler, PRIORITY_USER, PRIORITY_CLEANUP
 
 VERIFICATION_TEXT = (
     "Welcome to the server!\n"
@@ -39,7 +40,9 @@ class VerificationTicketView(View):
 
         await interaction.response.send_message("Deleting verification channel...", ephemeral=True)
         try:
-            await interaction.channel.delete(reason=f"Verification closed by {interaction.user}")
+            await rest_scheduler.delete_channel(
+                interaction.channel, priority=PRIORITY_CLEANUP, reason=f"Verification closed by {interaction.user}"
+            )
         except Exception:
             pass
 
@@ -91,8 +94,16 @@ class VerificationModal(Modal):
         # Safe channel name
         safe_name = f"verify-{interaction.user.name}".lower().replace(" ", "-")[:90]
 
+        async def notify_queued(position):
+            await interaction.followup.send(
+                f"⏳ Many requests are being processed — you're #{position} in line.", ephemeral=True
+            )
+
         try:
-            ch = await guild.create_text_channel(
+            ch = await rest_scheduler.create_text_channel(
+                guild,
+                priority=PRIORITY_USER,
+                on_queued=notify_queued,
                 name=safe_name,
                 category=parent_category,
                 overwrites=overwrites,
@@ -1,32 +1,109 @@
 # webserver.py
-from flask import Flask
-import threading
+import asyncio
+import math
+import os
+import time
 
-app = Flask("")
+from aiohttp import web
 
+from database import db
+from metrics import registry
 
-@app.route("/")
-def home():
-    return "Bot is running!", 200
+DEFAULT_PORT = int(os.getenv("PORT", "8080"))
+LOOP_LAG_INTERVAL = 0.5  # seconds between event loop lag samples
+HEALTH_MAX_LOOP_LAG = float(os.getenv("HEALTH_MAX_LOOP_LAG", "1.0"))
+HEALTH_DB_TIMEOUT = 2.0
 
+_runner = None
+_lag_task = None
+loop_lag = {"last": 0.0, "max": 0.0}
+registry.gauge("bot_event_loop_lag_seconds", "Most recent event loop scheduling delay", lambda: loop_lag["last"])
 
-def run(port: int):
-    app.run(host="0.0.0.0", port=port)
 
+async def _watch_loop_lag():
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, loop.time() - started - LOOP_LAG_INTERVAL)
+        loop_lag["last"] = lag
+        loop_lag["max"] = max(loop_lag["max"], lag)
 
-def start(port: int = 8080):
+
+async def _check_db():
+    try:
+        latency = await asyncio.wait_for(db.ping(), timeout=HEALTH_DB_TIMEOUT)
+        return {"ok": True, "backend": db.backend, "latency_ms": round(latency * 1000, 2)}
+    except Exception as e:
+        return {"ok": False, "backend": db.backend, "error": str(e) or type(e).__name__}
+
+
+def create_app(bot):
+    async def home(request):
+        return web.Response(text="Bot is running!")
+
+    async def healthz(request):
+        # Liveness: the loop is responsive and the database answers
+        database = await _check_db()
+        ok = database["ok"] and loop_lag["last"] <= HEALTH_MAX_LOOP_LAG
+        body = {
+            "status": "ok" if ok else "unhealthy",
+            "gateway": {
+                "connected": bot.is_ready() and not bot.is_closed(),
+                "latency_ms": round(bot.latency * 1000, 2) if math.isfinite(bot.latency) else None,
+            },
+            "loop_lag_ms": {k: round(v * 1000, 2) for k, v in loop_lag.items()},
+            "db": database,
+            "time": time.time(),
+        }
+        return web.json_response(body, status=200 if ok else 503)
+
+    async def readyz(request):
+        # Readiness: logged in to the gateway and the database is usable
+        database = await _check_db()
+        ready = bot.is_ready() and not bot.is_closed() and database["ok"]
+        return web.json_response({"ready": ready, "db": database}, status=200 if ready else 503)
+
+    async def metrics(request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app["bot"] = bot
+    app.router.add_get("/", home)
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+async def start(bot, port: int = DEFAULT_PORT):
     """
-    Start the Flask webserver in a separate thread.
-    If no port is given, defaults to 8080.
+    Start the health server on the bot's event loop.
+    If no port is given, uses $PORT or 8080.
     """
-    thread = threading.Thread(target=run, args=(port,))
-    thread.daemon = True
-    thread.start()
+    global _runner, _lag_task
+    if _runner:
+        return
+    _runner = web.AppRunner(create_app(bot), access_log=None)
+    await _runner.setup()
+    await web.TCPSite(_runner, host="0.0.0.0", port=port).start()
+    _lag_task = asyncio.create_task(_watch_loop_lag())
+    print(f"Health server listening on :{port}")
+
+
+async def stop():
+    global _runner, _lag_task
+    if _lag_task:
+        _lag_task.cancel()
+        _lag_task = None
+    if _runner:
+        await _runner.cleanup()
+        _runner = None
 
 
 # REQUIRED BY PY-CORD EXTENSION SYSTEM
 async def setup(bot):
     """
-    Automatically starts the Flask webserver on extension load.
+    Starts the health server on extension load.
     """
-    start()  # will use default port 8080
+    await start(bot)